@@ -4,17 +4,35 @@ Mininet Manager - 管理Mininet网络的启动和停止
 """
 
 import os
+import re
 import json
+import shlex
 import subprocess
 import time
 import tempfile
-import json
 import logging
 
+try:
+    import orjson  # 可选：更快的JSON编解码
+except ImportError:
+    orjson = None
+
 # 配置日志
 logger = logging.getLogger(__name__)
 from pathlib import Path
 
+# 读取JSON拓扑并启动Mininet的运行脚本
+RUNNER_SCRIPT = str(Path(__file__).resolve().parent / 'mininet_runner.py')
+
+# 标志文件
+MININET_READY_FLAG = '/tmp/mininet_ready'
+MININET_ERROR_FLAG = '/tmp/mininet_error'
+FLAG_FILES = (MININET_READY_FLAG, MININET_ERROR_FLAG)
+
+# Mininet创建的交换机网桥及其veth接口名
+SWITCH_BRIDGE_RE = re.compile(r'^s\d+$')
+SWITCH_VETH_RE = re.compile(r'^s\d+-eth\d+$')
+
 class MininetManager:
     def __init__(self):
         self.session_name = "mininet_session"
@@ -28,36 +46,34 @@ class MininetManager:
             self.stop_mininet()
             
             # 清理标志文件
-            for f in ['/tmp/mininet_ready', '/tmp/mininet_error']:
-                if os.path.exists(f):
-                    os.remove(f)
-            
-            # 生成拓扑脚本
-            script_path = self._generate_mininet_script(topology_data, topology_file)
-            if not script_path:
-                logger.error("无法生成拓扑脚本")
+            for f in FLAG_FILES:
+                try:
+                    os.unlink(f)
+                except FileNotFoundError:
+                    pass
+            
+            # 写入拓扑数据文件
+            topology_path = self._write_topology_file(topology_data, topology_file)
+            if not topology_path:
+                logger.error("无法生成拓扑文件")
                 return False
             
             # 创建tmux会话并启动Mininet
             logger.info("启动Mininet网络...")
             
             # 确保tmux会话被正确创建
-            subprocess.run(f"sudo -E tmux new-session -d -s {self.session_name}", 
-                         shell=True, check=True)
-            
-            # 等待会话创建
-            time.sleep(2)
+            subprocess.run(['sudo', '-E', 'tmux', 'new-session', '-d', '-s', self.session_name],
+                         check=True)
             
             # 在会话中运行Mininet CLI - 使用生成的拓扑脚本
             if topology_data or topology_file:
-                # 使用自定义拓扑脚本
-                cmd = f"sudo -E tmux send-keys -t {self.session_name} " \
-                      f"'python3 {script_path}' Enter"
+                # 使用运行脚本加载拓扑数据
+                run_cmd = f"python3 -u {shlex.quote(RUNNER_SCRIPT)} {shlex.quote(topology_path)}"
             else:
                 # 使用默认线性拓扑
-                cmd = f"sudo -E tmux send-keys -t {self.session_name} " \
-                      f"'mn --topo=linear,2' Enter"
-            subprocess.run(cmd, shell=True, check=True)
+                run_cmd = "mn --topo=linear,2"
+            subprocess.run(['sudo', '-E', 'tmux', 'send-keys', '-t', self.session_name, run_cmd, 'Enter'],
+                         check=True)
             
             # 等待网络启动
             logger.info("等待网络启动...")
@@ -66,65 +82,80 @@ class MininetManager:
                 return True
             else:
                 # 检查错误
-                if os.path.exists('/tmp/mininet_error'):
-                    with open('/tmp/mininet_error', 'r') as f:
+                try:
+                    with open(MININET_ERROR_FLAG, 'r') as f:
                         error = f.read()
-                    logger.error(f"Mininet启动失败: {error}")
-                else:
+                    logger.error("Mininet启动失败: %s", error)
+                except FileNotFoundError:
                     logger.error("Mininet启动超时")
                 return False
                 
         except subprocess.CalledProcessError as e:
-            logger.error(f"启动命令失败: {e}")
+            logger.error("启动命令失败: %s", e)
             return False
         except Exception as e:
-            logger.error(f"启动Mininet时出错: {e}")
+            logger.error("启动Mininet时出错: %s", e)
             return False
             
     def stop_mininet(self):
         """停止Mininet网络 - 使用系统级清理"""
         try:
             # 1. 停止tmux会话
-            subprocess.run(f"sudo tmux kill-session -t {self.session_name}", 
-                         shell=True, capture_output=True)
+            subprocess.run(['sudo', 'tmux', 'kill-session', '-t', self.session_name],
+                         stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
             
             # 2. 使用mn -c进行完整清理
-            subprocess.run("sudo mn -c", shell=True, capture_output=True)
+            subprocess.run(['sudo', 'mn', '-c'], stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
             
-            # 3. 清理残留的veth接口
-            cleanup_cmd = """
-            sudo ip link show | grep -o 's[0-9]\+-eth[0-9]\+' | sort -u | xargs -I {} sudo ip link delete {}
-            """
-            subprocess.run(cleanup_cmd, shell=True, capture_output=True)
+            # 3. 清理残留的veth接口：从/sys/class/net读取接口名，通过一次ip -batch删除；
+            #    交换机之间的veth删除一端后另一端随之消失，-force使后续命令继续执行
+            veths = self._list_switch_veths()
+            if veths:
+                subprocess.run(['sudo', 'ip', '-force', '-batch', '-'],
+                             input=''.join(f"link delete {iface}\n" for iface in veths),
+                             text=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
             
             # 4. 清理标志文件
-            for flag_path in ['/tmp/mininet_ready', '/tmp/mininet_error']:
-                if os.path.exists(flag_path):
-                    try:
-                        os.remove(flag_path)
-                    except:
-                        pass
-            
-            # 5. 清理OVS残留配置
-            subprocess.run("sudo ovs-vsctl --if-exists del-br s1", shell=True, capture_output=True)
-            subprocess.run("sudo ovs-vsctl --if-exists del-br s2", shell=True, capture_output=True)
-            subprocess.run("sudo ovs-vsctl --if-exists del-br s3", shell=True, capture_output=True)
+            for flag_path in FLAG_FILES:
+                try:
+                    os.unlink(flag_path)
+                except OSError:
+                    pass
+            
+            # 5. 清理OVS残留配置：一次ovs-vsctl事务删除所有残留交换机网桥
+            result = subprocess.run(['sudo', 'ovs-vsctl', 'list-br'], capture_output=True, text=True)
+            bridges = [br for br in result.stdout.split() if SWITCH_BRIDGE_RE.match(br)]
+            if bridges:
+                del_cmd = ['sudo', 'ovs-vsctl']
+                for bridge in bridges:
+                    del_cmd += ['--', '--if-exists', 'del-br', bridge]
+                subprocess.run(del_cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
             
             logger.info("Mininet网络已完全停止并清理")
             return True, "Mininet网络已完全停止并清理"
             
         except Exception as e:
-            logger.error(f"停止Mininet时出错: {e}")
+            logger.error("停止Mininet时出错: %s", e)
             return False, f"停止错误: {str(e)}"
     
+    def _session_exists(self):
+        """检查Mininet的tmux会话是否存在"""
+        result = subprocess.run(['sudo', 'tmux', 'list-sessions', '-F', '#{session_name}'],
+                              capture_output=True, text=True)
+        return self.session_name in result.stdout.split()
+    
+    def _list_switch_veths(self):
+        """列出残留的交换机veth接口名"""
+        try:
+            return sorted(name for name in os.listdir('/sys/class/net') if SWITCH_VETH_RE.match(name))
+        except OSError:
+            return []
+    
     def attach_to_cli(self):
         """附加到Mininet CLI会话"""
         try:
             # 检查会话是否存在
-            result = subprocess.run(f"sudo tmux list-sessions | grep {self.session_name}", 
-                                  shell=True, capture_output=True, text=True)
-            
-            if result.returncode != 0:
+            if not self._session_exists():
                 return False, "Mininet会话不存在"
             
             # 提供附加命令
@@ -134,45 +165,13 @@ class MininetManager:
         except Exception as e:
             return False, f"附加会话错误: {str(e)}"
 
-    def _generate_mininet_script(self, topology_data=None, topology_file=None):
-        """生成Mininet拓扑脚本"""
+    def _write_topology_file(self, topology_data=None, topology_file=None):
+        """将拓扑数据写入JSON文件，供mininet_runner.py读取"""
         try:
-            # 创建临时文件
-            temp_file = tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False)
-            script_path = temp_file.name
-            
-            # 基础导入
-            script = '''#!/usr/bin/env python3
-"""
-Mininet拓扑脚本 - 自动生成
-"""
-
-from mininet.net import Mininet
-from mininet.node import OVSSwitch, Controller
-from mininet.cli import CLI
-from mininet.log import setLogLevel, info
-from mininet.link import TCLink
-from mininet.topo import Topo
-import subprocess
-import time
-import os
-import sys
-
-'''
-            
-            # 添加拓扑类
-            script += '''
-class MyTopo(Topo):
-    def build(self):
-        """构建拓扑"""
-        # 添加交换机
-'''
-            
-            # 根据拓扑数据生成节点
             if topology_file and os.path.exists(topology_file):
                 # 从文件读取拓扑
-                with open(topology_file, 'r') as f:
-                    topology = json.load(f)
+                with open(topology_file, 'rb') as f:
+                    topology = orjson.loads(f.read()) if orjson else json.load(f)
             elif topology_data:
                 # 使用提供的拓扑数据
                 topology = topology_data
@@ -190,102 +189,29 @@ class MyTopo(Topo):
                     ]
                 }
             
-            # 添加交换机
-            for switch in topology.get('switches', []):
-                name = switch['name']
-                dpid = switch.get('dpid', '1')
-                script += f'        self.addSwitch("{name}", dpid="{dpid}")\n'
-            
-            # 添加主机
-            script += '\n        # 添加主机\n'
-            for host in topology.get('hosts', []):
-                name = host['name']
-                host_id = int(name[1:])  # 从h1, h2等提取数字ID
-                ip = host.get('ip', f'10.0.0.{host_id}/16')  # 改为/16子网掩码
-                mac = f'00:00:00:00:00:{host_id:02x}'  # MAC地址末位与IP末位相同
-                script += f'        self.addHost("{name}", ip="{ip}", mac="{mac}")\n'
-            
-            # 添加链路
-            script += '\n        # 添加链路\n'
-            for link in topology.get('links', []):
-                src = link['src']
-                dst = link['dst']
-                script += f'        self.addLink("{src}", "{dst}")\n'
-            
-            # 添加主函数
-            script += '''
-
-def run():
-    """创建网络并保持运行状态"""
-    try:
-        setLogLevel('info')
-        info('*** Starting Mininet topology...\\n')
-        
-        # 创建拓扑
-        topo = MyTopo()
-        net = Mininet(topo=topo, controller=None, switch=OVSSwitch)
-        
-        info('*** Starting network\\n')
-        net.start()
-        
-        # 验证交换机创建
-        info('*** Verifying switches...\\n')
-        if not net.switches:
-            raise Exception("No switches created in network")
-        
-        info('Found {} switches\\n'.format(len(net.switches)))
-        
-        # 等待OVS交换机就绪
-        info('*** Waiting for OVS switches...\\n')
-        max_wait = 15
-        for switch in net.switches:
-            waited = 0
-            while waited < max_wait:
-                try:
-                    result = subprocess.run(['ovs-vsctl', 'list-br'], 
-                                        capture_output=True, text=True, timeout=5)
-                    if switch.name in result.stdout:
-                        info('  ✓ {} is ready\\n'.format(switch.name))
-                        break
-                except Exception as e:
-                    info('  Error checking {}: {}\\n'.format(switch.name, e))
-                time.sleep(1)
-                waited += 1
-            
-            if waited >= max_wait:
-                info('  ⚠ {} not ready after {}s\\n'.format(switch.name, max_wait))
-        
-        info('*** Network is ready\\n')
-        info('*** Starting CLI...\\n')
-        CLI(net)
-        
-    except Exception as e:
-        info('Error: {}\\n'.format(e))
-    finally:
-        try:
-            if 'net' in locals():
-                net.stop()
-        except:
-            pass
-
-if __name__ == '__main__':
-    run()
-'''
-            
-            temp_file.write(script)
-            temp_file.close()
-            
-            # 设置可执行权限
-            os.chmod(script_path, 0o755)
+            with tempfile.NamedTemporaryFile(mode='wb', prefix='mntpp_topo_', suffix='.json',
+                                             delete=False) as temp_file:
+                if orjson:
+                    temp_file.write(orjson.dumps(topology))
+                else:
+                    temp_file.write(json.dumps(topology, separators=(',', ':')).encode())
             
-            return script_path
+            self.topology_script_path = temp_file.name
+            return temp_file.name
             
         except Exception as e:
+            logger.error("写入拓扑文件失败: %s", e)
             return None
     
     def _wait_for_mininet_ready(self, timeout=20):
-        """等待Mininet CLI启动完成 - 基于诊断结果改进"""
+        """等待Mininet CLI启动完成
+        
+        短间隔轮询（0.1s起，指数退避至0.5s）；捕获到提示符位于最后一行后，
+        间隔0.2s再捕获一次，两次均如此即视为就绪，无需向CLI输入命令验证
+        """
         start_time = time.time()
+        delay = 0.1
+        prompt_seen = False
         
         while time.time() - start_time < timeout:
             try:
@@ -302,46 +228,42 @@ if __name__ == '__main__':
                                       capture_output=True, text=True, timeout=3)
                 
                 output = result.stdout
-                if "mininet>" in output:
-                    logger.info("✅ Mininet CLI已启动")
-                    
-                    # 验证CLI功能
-                    subprocess.run(['sudo', 'tmux', 'send-keys', 
-                                  '-t', self.session_name, 'nodes', 'Enter'], 
-                                  capture_output=True)
-                    time.sleep(2)
-                    
-                    result = subprocess.run(['sudo', 'tmux', 'capture-pane', 
-                                           '-t', self.session_name, '-p'], 
-                                          capture_output=True, text=True, timeout=3)
-                    
-                    if "available nodes are" in result.stdout:
-                        logger.info("✅ Mininet CLI功能正常")
+                if self._prompt_at_end(output):
+                    # 连续两次看到提示符，确认CLI已稳定
+                    if prompt_seen:
+                        logger.info("✅ Mininet CLI已启动")
                         return True
+                    prompt_seen = True
+                    time.sleep(0.2)
+                    continue
+                prompt_seen = False
                 
                 # 检查是否有错误信息
                 if "Error" in output or "error" in output.lower():
-                    logger.error(f"启动错误: {output}")
+                    logger.error("启动错误: %s", output)
                     return False
                 
             except subprocess.TimeoutExpired:
                 logger.warning("命令超时")
             except Exception as e:
-                logger.debug(f"等待时出错: {e}")
+                logger.debug("等待时出错: %s", e)
             
-            time.sleep(2)  # 给更多启动时间
+            time.sleep(delay)
+            delay = min(delay * 2, 0.5)
         
         logger.error("等待Mininet就绪超时")
         return False
     
+    def _prompt_at_end(self, output):
+        """CLI提示符是否位于面板输出的最后一个非空行"""
+        lines = output.rstrip().split('\n')
+        return lines[-1].strip().startswith("mininet>")
+    
     def get_status(self):
         """获取Mininet网络状态"""
         try:
             # 检查tmux会话
-            result = subprocess.run(f"sudo tmux list-sessions | grep {self.session_name}", 
-                                  shell=True, capture_output=True, text=True)
-            
-            if result.returncode != 0:
+            if not self._session_exists():
                 return {"running": False, "message": "Mininet未运行"}
             
             # 检查CLI是否就绪
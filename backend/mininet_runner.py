@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Mininet拓扑运行脚本
+从JSON拓扑文件构建网络并进入Mininet CLI
+
+用法: python3 mininet_runner.py <topology.json>
+"""
+
+from mininet.net import Mininet
+from mininet.node import OVSSwitch
+from mininet.cli import CLI
+from mininet.log import setLogLevel, info
+from mininet.topo import Topo
+import time
+import json
+import os
+import sys
+
+try:
+    import orjson  # 可选：更快的JSON解码
+except ImportError:
+    orjson = None
+
+# ovs-vswitchd运行目录，存放各网桥的.mgmt套接字
+OVS_RUNDIR = os.environ.get('OVS_RUNDIR', '/var/run/openvswitch')
+
+
+class JsonTopo(Topo):
+    def build(self, topology=None):
+        """根据拓扑数据构建拓扑"""
+        topology = topology or {}
+
+        # 添加交换机
+        for switch in topology.get('switches', []):
+            self.addSwitch(switch['name'], dpid=str(switch.get('dpid', '1')))
+
+        # 添加主机
+        for host in topology.get('hosts', []):
+            name = host['name']
+            host_id = int(name[1:])  # 从h1, h2等提取数字ID
+            ip = host.get('ip', f'10.0.0.{host_id}/16')
+            mac = f'00:00:00:00:00:{host_id:02x}'  # MAC地址末位与IP末位相同
+            self.addHost(name, ip=ip, mac=mac)
+
+        # 添加链路
+        for link in topology.get('links', []):
+            self.addLink(link['src'], link['dst'])
+
+
+def run(topology_file):
+    """创建网络并保持运行状态"""
+    net = None
+    try:
+        setLogLevel('info')
+        info('*** Starting Mininet topology...\n')
+
+        with open(topology_file, 'rb') as f:
+            topology = orjson.loads(f.read()) if orjson else json.load(f)
+
+        # 创建拓扑
+        topo = JsonTopo(topology=topology)
+        net = Mininet(topo=topo, controller=None, switch=OVSSwitch)
+
+        info('*** Starting network\n')
+        net.start()
+
+        # 验证交换机创建
+        info('*** Verifying switches...\n')
+        if not net.switches:
+            raise Exception("No switches created in network")
+
+        info('Found {} switches\n'.format(len(net.switches)))
+
+        # 等待OVS交换机就绪：网桥创建后ovs-vswitchd会生成<网桥>.mgmt套接字，
+        # 直接检查该文件即可，无需每秒调用ovs-vsctl list-br
+        info('*** Waiting for OVS switches...\n')
+        max_wait = 15
+        for switch in net.switches:
+            mgmt_path = os.path.join(OVS_RUNDIR, '{}.mgmt'.format(switch.name))
+            deadline = time.time() + max_wait
+            while not os.path.exists(mgmt_path) and time.time() < deadline:
+                time.sleep(0.05)
+
+            if os.path.exists(mgmt_path):
+                info('  ✓ {} is ready\n'.format(switch.name))
+            else:
+                info('  ⚠ {} not ready after {}s\n'.format(switch.name, max_wait))
+
+        info('*** Network is ready\n')
+        info('*** Starting CLI...\n')
+        CLI(net)
+
+    except Exception as e:
+        info('Error: {}\n'.format(e))
+    finally:
+        try:
+            if net is not None:
+                net.stop()
+        except:
+            pass
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 2:
+        print('用法: python3 {} <topology.json>'.format(sys.argv[0]))
+        sys.exit(1)
+    run(sys.argv[1])
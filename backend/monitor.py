@@ -4,70 +4,459 @@
 用于收集性能数据和监控网络状态
 """
 
+import os
+import re
 import subprocess
 import time
 import json
+import shlex
+import shutil
+import selectors
+import threading
 import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Any
-from .ovs_controller import OVSController
+from .ovs_controller import OVSController, get_ovs_controller
 
 logger = logging.getLogger(__name__)
 
+# 单次调用中各段统计输出的分隔符
+_SECTION_MARKERS = {
+    'flows': '===flows===',
+    'ports': '===ports===',
+    'aggregate': '===aggregate==='
+}
+# 各段统计对应的ovs-ofctl子命令
+_SECTION_COMMANDS = {
+    'flows': 'dump-flows',
+    'ports': 'dump-ports',
+    'aggregate': 'dump-aggregate'
+}
+
+# 流表监视的事件中不参与标识流表项的字段
+_FLOW_EVENT_META_KEYS = frozenset({'event', 'reason', 'cookie', 'idle_timeout', 'hard_timeout', 'xid'})
+
+# 订阅OVSDB Interface表统计信息的命令
+OVSDB_MONITOR_CMD = ['sudo', 'ovsdb-client', 'monitor', '--format=json',
+                     'Open_vSwitch', 'Interface', 'name,statistics']
+
+# ovs-ofctl输出中的 key=value 字段
+_KV_RE = re.compile(r'(\w+)=([^,\s)]+)')
+# dump-ports输出中的单个端口块，例如：
+#   port  1: rx pkts=8, bytes=648, drop=0, errs=0, frame=0, over=0, crc=0
+#            tx pkts=8, bytes=648, drop=0, errs=0, coll=0
+_PORT_RE = re.compile(
+    r'port\s+"?([^":\s]+)"?:\s*'
+    r'rx\s+pkts=([^,\s]+),\s*bytes=([^,\s]+),\s*drop=([^,\s]+),\s*errs=([^,\s]+)[^\n]*\n'
+    r'\s*tx\s+pkts=([^,\s]+),\s*bytes=([^,\s]+),\s*drop=([^,\s]+),\s*errs=([^,\s]+)'
+)
+_PORT_FIELDS = ('rx_pkts', 'rx_bytes', 'rx_drop', 'rx_errs',
+                'tx_pkts', 'tx_bytes', 'tx_drop', 'tx_errs')
+# OVSDB Interface表statistics中与_PORT_FIELDS对应的计数器
+_OVSDB_PORT_KEYS = ('rx_packets', 'rx_bytes', 'rx_dropped', 'rx_errors',
+                    'tx_packets', 'tx_bytes', 'tx_dropped', 'tx_errors')
+# 需要转换为整数的流表字段
+_INT_KEYS = frozenset({'n_packets', 'n_bytes', 'priority', 'idle_timeout', 'hard_timeout'})
+
+# /sys/class/net/<接口>/statistics 下读取的计数器
+_INTERFACE_COUNTERS = ('rx_bytes', 'tx_bytes', 'rx_packets', 'tx_packets',
+                       'rx_errors', 'tx_errors', 'rx_dropped', 'tx_dropped')
+
+# 内存中保留的最近样本数；完整数据以JSON-lines流式写入磁盘
+RECENT_SAMPLES = 128
+# 每写入多少条样本刷新一次文件缓冲
+FLUSH_EVERY = 10
+# 初始流表回复的表头之后，输出已全部处理且管道空闲多久（秒）视为初始流表已完整
+FLOW_INITIAL_QUIET = 0.2
+
+def _to_int(value: str):
+    """尽量转换为整数，失败时保留原字符串"""
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+def _ovsdb_map(value) -> Dict[str, Any]:
+    """将OVSDB JSON中的 ["map", [[k, v], ...]] 转换为dict"""
+    if isinstance(value, list) and len(value) == 2 and value[0] == 'map':
+        return dict(value[1])
+    return {}
+
 class NetworkMonitor:
-    def __init__(self):
-        self.ovs_controller = OVSController()
+    def __init__(self, stats_cache_ttl: float = 1.0, ovs_controller: OVSController = None):
+        self.ovs_controller = ovs_controller or get_ovs_controller()
         self.monitoring_data = {}
         self.is_monitoring = False
+        self.stats_cache_ttl = stats_cache_ttl
+        self._stats_cache = {}  # {switch: stats}，在stats_cache_ttl秒内复用
+        self._data_fp = None    # JSON-lines数据文件句柄
+        
+        # OVSDB订阅：接口统计由ovsdb-client推送，无需每次采样fork ovs-ofctl dump-ports
+        self.interface_stats = {}  # {接口名: 统计信息}
+        self._interface_names = {}  # {行uuid: 接口名}
+        self._interface_lock = threading.Lock()
+        self._ovsdb_proc = None
+        self._ovsdb_thread = None
+        
+        # 流表监视：每个交换机一个常驻的 ovs-ofctl monitor 进程，维护各交换机当前的流表项
+        self.flow_tables = {}        # {交换机: {流表项标识: actions}}
+        self._flow_tables_ready = set()  # 已收到初始流表的交换机
+        self._flow_lock = threading.Lock()
+        self._flow_monitor_procs = {}  # {交换机: Popen}
+        self._flow_monitor_stop = None
+        self._flow_monitor_thread = None
     
-    def start_monitoring(self, switches: List[str], interval: int = 5):
-        """开始监控网络状态"""
+    def start_monitoring(self, switches: List[str], interval: int = 5, data_file: str = None,
+                         use_ovsdb_monitor: bool = True):
+        """开始监控网络状态
+        
+        指定data_file时，每个样本以一行JSON追加写入该文件；
+        内存中只保留最近RECENT_SAMPLES个样本。
+        use_ovsdb_monitor为True时订阅OVSDB接口统计，端口统计直接取自订阅结果，
+        并为每个交换机启动流表监视，流表为空的交换机不再执行dump-flows
+        """
+        self._close_data_file()
+        self._stop_ovsdb_monitor()
+        self._stop_flow_monitors()
         self.is_monitoring = True
         self.monitoring_data = {
             'switches': switches,
             'interval': interval,
             'start_time': time.time(),
-            'data': []
+            'data_file': data_file,
+            'total_samples': 0,
+            'latest': None,
+            'data': deque(maxlen=RECENT_SAMPLES)
         }
         
-        logger.info(f"Started monitoring {len(switches)} switches with {interval}s interval")
+        if data_file:
+            self._data_fp = open(data_file, 'a')
+        
+        if use_ovsdb_monitor:
+            self._start_ovsdb_monitor()
+            self._start_flow_monitors(switches)
+        
+        logger.info("Started monitoring %s switches with %ss interval", len(switches), interval)
     
     def stop_monitoring(self):
         """停止监控"""
         self.is_monitoring = False
+        self._close_data_file()
+        self._stop_ovsdb_monitor()
+        self._stop_flow_monitors()
         logger.info("Stopped network monitoring")
     
+    def _start_ovsdb_monitor(self) -> bool:
+        """启动常驻的ovsdb-client monitor进程及其读取线程"""
+        try:
+            self._ovsdb_proc = subprocess.Popen(OVSDB_MONITOR_CMD, stdout=subprocess.PIPE,
+                                                stderr=subprocess.DEVNULL, text=True)
+        except OSError as e:
+            logger.warning("Failed to start ovsdb-client monitor, falling back to polling: %s", e)
+            self._ovsdb_proc = None
+            return False
+        
+        self._ovsdb_thread = threading.Thread(target=self._read_ovsdb_updates,
+                                              args=(self._ovsdb_proc,), daemon=True)
+        self._ovsdb_thread.start()
+        return True
+    
+    def _stop_ovsdb_monitor(self):
+        """停止OVSDB订阅"""
+        if self._ovsdb_proc:
+            try:
+                self._ovsdb_proc.terminate()
+                self._ovsdb_proc.wait(timeout=2)
+            except subprocess.TimeoutExpired:
+                self._ovsdb_proc.kill()
+            except Exception as e:
+                logger.warning("Error stopping ovsdb-client monitor: %s", e)
+            self._ovsdb_proc = None
+            self._ovsdb_thread = None
+        
+        with self._interface_lock:
+            self.interface_stats.clear()
+            self._interface_names.clear()
+    
+    def _ovsdb_monitor_alive(self) -> bool:
+        """OVSDB订阅是否仍在运行"""
+        return self._ovsdb_proc is not None and self._ovsdb_proc.poll() is None
+    
+    def _read_ovsdb_updates(self, proc):
+        """读取ovsdb-client推送的更新（每行一个JSON表格），合并到interface_stats"""
+        for line in proc.stdout:
+            try:
+                update = json.loads(line)
+            except ValueError:
+                continue
+            
+            headings = update.get('headings', [])
+            with self._interface_lock:
+                for row in update.get('data', []):
+                    fields = dict(zip(headings, row))
+                    action = fields.get('action')
+                    uuid = str(fields.get('row'))
+                    
+                    if action == 'delete':
+                        name = self._interface_names.pop(uuid, None)
+                        self.interface_stats.pop(name, None)
+                        continue
+                    if action == 'old':
+                        continue
+                    
+                    name = fields.get('name') or self._interface_names.get(uuid)
+                    if not name:
+                        continue
+                    self._interface_names[uuid] = name
+                    if 'statistics' in fields:
+                        self.interface_stats[name] = _ovsdb_map(fields['statistics'])
+    
+    def _get_subscribed_port_stats(self, switch: str) -> List[Dict[str, Any]]:
+        """从OVSDB订阅结果中取出交换机各端口的统计信息
+        
+        字段与dump-ports解析结果(_PORT_FIELDS)一致；与交换机同名的内部接口即LOCAL端口，
+        与dump-ports一样排在最前，其余端口按编号排序
+        """
+        prefix = f"{switch}-eth"
+        ports = []
+        with self._interface_lock:
+            for name, stats in self.interface_stats.items():
+                if name == switch:
+                    port = 'LOCAL'
+                elif name.startswith(prefix):
+                    port = name[len(prefix):]
+                else:
+                    continue
+                entry = {'port': port}
+                entry.update(zip(_PORT_FIELDS, (stats.get(key, 0) for key in _OVSDB_PORT_KEYS)))
+                ports.append(entry)
+        
+        ports.sort(key=lambda entry: int(entry['port']) if entry['port'].isdigit() else -1)
+        return ports
+    
+    def _start_flow_monitors(self, switches: List[str]):
+        """为每个交换机启动 ovs-ofctl monitor <交换机> watch:，由单个线程通过selectors读取"""
+        selector = selectors.DefaultSelector()
+        for switch in switches:
+            try:
+                proc = subprocess.Popen(['sudo', 'ovs-ofctl', 'monitor', switch, 'watch:'],
+                                        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+            except OSError as e:
+                logger.warning("Failed to start flow monitor for %s: %s", switch, e)
+                continue
+            self._flow_monitor_procs[switch] = proc
+            selector.register(proc.stdout, selectors.EVENT_READ, switch)
+        
+        if not self._flow_monitor_procs:
+            selector.close()
+            return
+        
+        self._flow_monitor_stop = threading.Event()
+        self._flow_monitor_thread = threading.Thread(target=self._read_flow_events,
+                                                     args=(selector, self._flow_monitor_stop),
+                                                     daemon=True)
+        self._flow_monitor_thread.start()
+    
+    def _stop_flow_monitors(self):
+        """停止所有流表监视进程"""
+        if self._flow_monitor_stop:
+            self._flow_monitor_stop.set()
+        
+        for switch, proc in self._flow_monitor_procs.items():
+            try:
+                proc.terminate()
+                proc.wait(timeout=2)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+            except Exception as e:
+                logger.warning("Error stopping flow monitor for %s: %s", switch, e)
+        
+        self._flow_monitor_procs = {}
+        self._flow_monitor_stop = None
+        self._flow_monitor_thread = None
+        with self._flow_lock:
+            self.flow_tables.clear()
+            self._flow_tables_ready.clear()
+    
+    def _read_flow_events(self, selector, stop_event):
+        """读取各交换机流表监视进程的输出，更新flow_tables
+        
+        直接从文件描述符读取并自行按行切分，避免已缓冲的行滞留到下一次可读事件；
+        初始回复表头之后的输出全部处理完（出现下一条回复表头，或停在行边界且管道
+        空闲FLOW_INITIAL_QUIET秒）才将该交换机标记为已拿到初始流表
+        """
+        buffers = {}        # {交换机: 未结束的半行}
+        headers_seen = set()
+        initial = {}        # 初始回复尚未确认完整的交换机 {交换机: 最后收到数据的时间}
+        try:
+            while not stop_event.is_set() and selector.get_map():
+                for key, _ in selector.select(timeout=FLOW_INITIAL_QUIET if initial else 1):
+                    switch = key.data
+                    data = os.read(key.fd, 65536)
+                    if not data:
+                        selector.unregister(key.fileobj)
+                        buffers.pop(switch, None)
+                        initial.pop(switch, None)
+                        with self._flow_lock:
+                            self._flow_tables_ready.discard(switch)
+                        continue
+                    
+                    *lines, buffers[switch] = (buffers.get(switch, b'') + data).split(b'\n')
+                    for line in lines:
+                        line = line.decode(errors='replace').strip()
+                        if 'FLOW_MONITOR reply' in line:
+                            if switch in initial:
+                                # 下一条回复开始，初始回复已全部处理
+                                del initial[switch]
+                                self._mark_flow_table_ready(switch)
+                            elif switch not in headers_seen:
+                                headers_seen.add(switch)
+                                initial[switch] = time.monotonic()
+                            continue
+                        self._apply_flow_event(switch, line)
+                    if switch in initial:
+                        initial[switch] = time.monotonic()
+                
+                now = time.monotonic()
+                for switch, last_data in list(initial.items()):
+                    if not buffers.get(switch) and now - last_data >= FLOW_INITIAL_QUIET:
+                        del initial[switch]
+                        self._mark_flow_table_ready(switch)
+        finally:
+            selector.close()
+    
+    def _mark_flow_table_ready(self, switch: str):
+        """标记该交换机的初始流表已完整（初始流表为空时也建立空表）"""
+        with self._flow_lock:
+            self.flow_tables.setdefault(switch, {})
+            self._flow_tables_ready.add(switch)
+    
+    def _apply_flow_event(self, switch: str, line: str):
+        """将一行流表监视输出合并到该交换机的流表"""
+        fields, _, actions = line.partition(' actions=')
+        pairs = _KV_RE.findall(fields)
+        event = dict(pairs).get('event')
+        if not event:
+            return
+        
+        flow_key = tuple(sorted((k, v) for k, v in pairs if k not in _FLOW_EVENT_META_KEYS))
+        with self._flow_lock:
+            table = self.flow_tables.setdefault(switch, {})
+            if event == 'DELETED':
+                table.pop(flow_key, None)
+            else:
+                table[flow_key] = actions.strip()
+    
+    def _flow_table_known_empty(self, switch: str) -> bool:
+        """流表监视确认该交换机当前没有任何流表项"""
+        proc = self._flow_monitor_procs.get(switch)
+        if proc is None or proc.poll() is not None:
+            return False
+        with self._flow_lock:
+            return switch in self._flow_tables_ready and not self.flow_tables.get(switch)
+    
+    def _close_data_file(self):
+        """关闭JSON-lines数据文件"""
+        if self._data_fp:
+            try:
+                self._data_fp.close()
+            except Exception as e:
+                logger.warning("Error closing monitoring data file: %s", e)
+            self._data_fp = None
+    
+    def _record_sample(self, sample: Dict[str, Any]):
+        """记录一个监控样本：写入数据文件并放入最近样本缓冲"""
+        self.monitoring_data['data'].append(sample)
+        self.monitoring_data['latest'] = sample
+        self.monitoring_data['total_samples'] += 1
+        
+        if self._data_fp:
+            self._data_fp.write(json.dumps(sample, separators=(',', ':'), default=str) + '\n')
+            if self.monitoring_data['total_samples'] % FLUSH_EVERY == 0:
+                self._data_fp.flush()
+    
     def collect_switch_stats(self, switch: str) -> Dict[str, Any]:
-        """收集交换机统计信息"""
+        """收集交换机统计信息
+        
+        流表、端口和聚合统计通过一次 sudo sh -c 调用获取，按分隔符拆分输出；
+        OVSDB订阅可用时端口统计直接取自订阅结果。
+        stats_cache_ttl秒内的重复请求直接返回缓存结果
+        """
+        cached = self._stats_cache.get(switch)
+        if cached and time.time() - cached['timestamp'] < self.stats_cache_ttl:
+            return cached
+        
         try:
             stats = {}
             
+            subscribed_ports = self._get_subscribed_port_stats(switch) if self._ovsdb_monitor_alive() else []
+            if subscribed_ports:
+                stats['ports'] = subscribed_ports
+            
+            # 流表监视确认流表为空时无需dump-flows
+            flows_empty = self._flow_table_known_empty(switch)
+            if flows_empty:
+                stats['flows'] = []
+            
+            quoted = shlex.quote(switch)
+            script = '; '.join(
+                f"echo {_SECTION_MARKERS[section]}; ovs-ofctl {command} {quoted}"
+                for section, command in _SECTION_COMMANDS.items()
+                if not (section == 'ports' and subscribed_ports)
+                and not (section == 'flows' and flows_empty)
+            )
+            result = self.ovs_controller.execute_command(['sudo', 'sh', '-c', script])
+            sections = self._split_sections(result['stdout'])
+            
             # 获取流表统计
-            flows_result = self.ovs_controller.dump_flows(switch)
-            if flows_result['success']:
-                stats['flows'] = self._parse_flow_stats(flows_result['stdout'])
+            if sections.get('flows'):
+                stats['flows'] = self._parse_flow_stats(sections['flows'])
             
             # 获取端口统计
-            ports_result = self.ovs_controller.get_port_stats(switch)
-            if ports_result['success']:
-                stats['ports'] = self._parse_port_stats(ports_result['stdout'])
+            if sections.get('ports'):
+                stats['ports'] = self._parse_port_stats(sections['ports'])
             
             # 获取聚合统计
-            aggregate_result = self.ovs_controller.get_switch_stats(switch)
-            if aggregate_result['success']:
-                stats['aggregate'] = self._parse_aggregate_stats(aggregate_result['stdout'])
+            if sections.get('aggregate'):
+                stats['aggregate'] = self._parse_aggregate_stats(sections['aggregate'])
             
             stats['timestamp'] = time.time()
             stats['switch'] = switch
             
+            self._stats_cache[switch] = stats
             return stats
             
         except Exception as e:
-            logger.error(f"Error collecting stats for switch {switch}: {e}")
+            logger.error("Error collecting stats for switch %s: %s", switch, e)
             return {}
     
+    def _split_sections(self, output: str) -> Dict[str, str]:
+        """按分隔符拆分批量统计输出"""
+        marker_to_key = {marker: key for key, marker in _SECTION_MARKERS.items()}
+        sections = {}
+        current_key = None
+        current_lines = []
+        
+        for line in output.split('\n'):
+            key = marker_to_key.get(line.strip())
+            if key:
+                if current_key:
+                    sections[current_key] = '\n'.join(current_lines)
+                current_key = key
+                current_lines = []
+            elif current_key:
+                current_lines.append(line)
+        
+        if current_key:
+            sections[current_key] = '\n'.join(current_lines)
+        
+        return sections
+    
     def collect_all_stats(self) -> Dict[str, Any]:
-        """收集所有交换机的统计信息"""
-        if not self.monitoring_data.get('switches'):
+        """收集所有交换机的统计信息（各交换机并行采集）"""
+        switches = self.monitoring_data.get('switches')
+        if not switches:
             return {}
         
         all_stats = {
@@ -75,111 +464,67 @@ class NetworkMonitor:
             'switches': {}
         }
         
-        for switch in self.monitoring_data['switches']:
-            stats = self.collect_switch_stats(switch)
-            if stats:
-                all_stats['switches'][switch] = stats
+        with ThreadPoolExecutor(max_workers=min(32, len(switches))) as executor:
+            for switch, stats in zip(switches, executor.map(self.collect_switch_stats, switches)):
+                if stats:
+                    all_stats['switches'][switch] = stats
         
         # 保存到监控数据
         if self.is_monitoring:
-            self.monitoring_data['data'].append(all_stats)
+            self._record_sample(all_stats)
         
         return all_stats
     
     def _parse_flow_stats(self, flow_output: str) -> List[Dict[str, Any]]:
         """解析流表统计信息"""
         flows = []
-        lines = flow_output.strip().split('\n')
         
-        for line in lines[1:]:  # 跳过表头
-            if line.strip():
-                parts = line.split(',')
-                flow = {}
-                
-                for part in parts:
-                    if '=' in part:
-                        key, value = part.split('=', 1)
-                        key = key.strip()
-                        value = value.strip()
-                        
-                        if key in ['n_packets', 'n_bytes', 'priority', 'idle_timeout', 'hard_timeout']:
-                            try:
-                                value = int(value)
-                            except ValueError:
-                                pass
-                        
-                        flow[key] = value
-                
-                if flow:
-                    flows.append(flow)
+        for line in flow_output.strip().splitlines()[1:]:  # 跳过表头
+            # actions字段可能包含逗号，单独截取
+            fields, _, actions = line.partition(' actions=')
+            flow = {key: (_to_int(value) if key in _INT_KEYS else value)
+                    for key, value in _KV_RE.findall(fields)}
+            if actions:
+                flow['actions'] = actions.strip()
+            
+            if flow:
+                flows.append(flow)
         
         return flows
     
     def _parse_port_stats(self, port_output: str) -> List[Dict[str, Any]]:
         """解析端口统计信息"""
         ports = []
-        lines = port_output.strip().split('\n')
-        
-        current_port = None
-        for line in lines:
-            line = line.strip()
-            if line.startswith('port') and ':' in line:
-                port_info = line.split(':')
-                if len(port_info) >= 2:
-                    current_port = {
-                        'port': port_info[0].split()[1],
-                        'name': port_info[1].split()[0] if len(port_info) > 1 else 'unknown'
-                    }
-            elif current_port and 'rx' in line:
-                parts = line.split()
-                if len(parts) >= 3:
-                    try:
-                        current_port[parts[0]] = int(parts[2])
-                    except ValueError:
-                        current_port[parts[0]] = parts[2]
-            elif current_port and 'tx' in line:
-                parts = line.split()
-                if len(parts) >= 3:
-                    try:
-                        current_port[parts[0]] = int(parts[2])
-                    except ValueError:
-                        current_port[parts[0]] = parts[2]
-                
-                if current_port:
-                    ports.append(current_port)
-                    current_port = None
+        
+        for match in _PORT_RE.finditer(port_output):
+            port = {'port': match.group(1)}
+            port.update(zip(_PORT_FIELDS, map(_to_int, match.groups()[1:])))
+            ports.append(port)
         
         return ports
     
     def _parse_aggregate_stats(self, aggregate_output: str) -> Dict[str, Any]:
         """解析聚合统计信息"""
-        aggregate = {}
-        lines = aggregate_output.strip().split('\n')
-        
-        for line in lines:
-            if '=' in line:
-                key, value = line.split('=', 1)
-                key = key.strip()
-                value = value.strip()
-                
-                try:
-                    value = int(value)
-                except ValueError:
-                    pass
-                
-                aggregate[key] = value
-        
-        return aggregate
+        return {key: _to_int(value) for key, value in _KV_RE.findall(aggregate_output)}
+    
+    def read_interface_counters(self, interface: str) -> Dict[str, int]:
+        """直接读取sysfs中的接口计数器（无需子进程、无需进入主机网络命名空间）"""
+        counters = {}
+        stats_dir = os.path.join('/sys/class/net', interface, 'statistics')
+        for name in _INTERFACE_COUNTERS:
+            with open(os.path.join(stats_dir, name)) as f:
+                counters[name] = int(f.read())
+        return counters
     
     def run_iperf_test(self, src_host: str, dst_host: str, duration: int = 10) -> Dict[str, Any]:
         """运行iperf测试"""
         try:
             # 注意：这需要在Mininet环境中运行
-            cmd = f"h{src_host} iperf -c h{dst_host} -t {duration} -J"
+            cmd = [f"h{src_host}", 'iperf', '-c', f"h{dst_host}", '-t', str(duration), '-J']
             
             # 通过tmux发送命令
             # 这里简化处理，实际需要在Mininet CLI中执行
-            result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
+            result = subprocess.run(cmd, capture_output=True, text=True)
             
             if result.returncode == 0:
                 try:
@@ -213,38 +558,90 @@ class NetworkMonitor:
     
     def get_monitoring_summary(self) -> Dict[str, Any]:
         """获取监控摘要"""
-        if not self.monitoring_data.get('data'):
+        if not self.monitoring_data.get('total_samples'):
             return {}
         
-        summary = {
-            'total_data_points': len(self.monitoring_data['data']),
+        return self._build_summary(self.monitoring_data['latest'])
+    
+    def _build_summary(self, latest: Dict[str, Any]) -> Dict[str, Any]:
+        """根据最新样本构建监控摘要"""
+        return {
+            'total_data_points': self.monitoring_data['total_samples'],
             'monitoring_duration': time.time() - self.monitoring_data['start_time'],
             'switches': self.monitoring_data['switches'],
-            'latest_data': self.monitoring_data['data'][-1] if self.monitoring_data['data'] else None
+            'latest_data': latest
         }
+    
+    def collect_and_summarize(self):
+        """采集一次所有交换机的统计并同时生成摘要，返回 (统计数据, 摘要)
         
-        return summary
+        摘要直接引用刚采集的数据，不再回头读取monitoring_data
+        """
+        data = self.collect_all_stats()
+        if not self.monitoring_data.get('total_samples'):
+            return data, {}
+        
+        latest = data if self.is_monitoring else self.monitoring_data['latest']
+        return data, self._build_summary(latest)
     
     def save_monitoring_data(self, filename: str):
-        """保存监控数据到文件"""
+        """保存监控数据到文件（JSON-lines格式，每行一个样本）
+        
+        监控数据已流式写入data_file时只需落盘或复制该文件，无需重新序列化
+        """
         try:
-            with open(filename, 'w') as f:
-                json.dump(self.monitoring_data, f, indent=2, default=str)
+            if self._data_fp:
+                self._data_fp.flush()
+                os.fsync(self._data_fp.fileno())
             
-            logger.info(f"Monitoring data saved to {filename}")
+            data_file = self.monitoring_data.get('data_file')
+            if data_file and os.path.abspath(data_file) == os.path.abspath(filename):
+                pass
+            elif data_file and os.path.exists(data_file):
+                shutil.copyfile(data_file, filename)
+            else:
+                with open(filename, 'w') as f:
+                    for sample in self.monitoring_data.get('data', []):
+                        f.write(json.dumps(sample, separators=(',', ':'), default=str) + '\n')
+            
+            logger.info("Monitoring data saved to %s", filename)
             
         except Exception as e:
-            logger.error(f"Error saving monitoring data: {e}")
+            logger.error("Error saving monitoring data: %s", e)
     
     def load_monitoring_data(self, filename: str) -> bool:
-        """从文件加载监控数据"""
+        """从文件加载监控数据（兼容旧的单个JSON文档格式）"""
         try:
             with open(filename, 'r') as f:
-                self.monitoring_data = json.load(f)
+                content = f.read()
+            
+            try:
+                document = json.loads(content)
+            except json.JSONDecodeError:
+                document = None
+            
+            if isinstance(document, dict) and 'data' in document:
+                samples = document['data']
+                switches = document.get('switches', [])
+                start_time = document.get('start_time')
+            else:
+                samples = [json.loads(line) for line in content.splitlines() if line.strip()]
+                switches = list(samples[-1].get('switches', {})) if samples else []
+                start_time = samples[0].get('timestamp') if samples else None
+            
+            self.monitoring_data = {
+                'switches': switches,
+                'interval': document.get('interval') if isinstance(document, dict) else None,
+                'start_time': start_time if start_time is not None else time.time(),
+                'data_file': None,
+                'total_samples': len(samples),
+                'latest': samples[-1] if samples else None,
+                'data': deque(samples, maxlen=RECENT_SAMPLES)
+            }
             
-            logger.info(f"Monitoring data loaded from {filename}")
+            logger.info("Monitoring data loaded from %s", filename)
             return True
             
         except Exception as e:
-            logger.error(f"Error loading monitoring data: {e}")
-            return False
\ No newline at end of file
+            logger.error("Error loading monitoring data: %s", e)
+            return False
@@ -4,140 +4,260 @@ OVS控制器
 执行流表下发和清除操作
 """
 
+import asyncio
+import functools
 import subprocess
 import logging
-from typing import List, Dict, Any
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Union
 
 logger = logging.getLogger(__name__)
 
+# 执行历史最多保留的条目数
+HISTORY_SIZE = 512
+# 执行历史中保留的stderr末尾字符数
+STDERR_TAIL = 256
+# execute_commands并行执行的最大线程数
+MAX_COMMAND_WORKERS = 16
+
+# 流表规则字段 -> ovs-ofctl匹配字段
+_FIELD_MAP = (
+    ('eth_src', 'dl_src'),
+    ('eth_dst', 'dl_dst'),
+    ('ip_src', 'nw_src'),
+    ('ip_dst', 'nw_dst')
+)
+
 class OVSController:
     def __init__(self):
-        self.executed_commands = []
+        # 只保存命令摘要，不保留完整stdout（如dump-flows输出）
+        self.executed_commands = deque(maxlen=HISTORY_SIZE)
     
-    def execute_command(self, command: str) -> Dict[str, Any]:
-        """执行单个OVS命令"""
+    def execute_command(self, command: Union[str, List[str]], input_data: str = None,
+                        discard_stdout: bool = False) -> Dict[str, Any]:
+        """执行单个OVS命令
+        
+        command为列表时直接作为argv执行（不经过shell），为字符串时经shell执行；
+        input_data通过stdin传给命令，用于ovs-ofctl批量下发；
+        discard_stdout为True时stdout直接丢弃（结果中为空字符串），只读取stderr
+        """
+        shell = isinstance(command, str)
+        command_str = command if shell else ' '.join(command)
         try:
-            logger.info(f"Executing: {command}")
+            logger.info("Executing: %s", command_str)
+            
+            result = subprocess.run(command, shell=shell, input=input_data, text=True,
+                                    stdout=subprocess.DEVNULL if discard_stdout else subprocess.PIPE,
+                                    stderr=subprocess.PIPE)
             
-            result = subprocess.run(command, shell=True, capture_output=True, text=True)
+            return self._finish_command(command_str, result.returncode, result.stdout or '', result.stderr)
             
-            execution_result = {
-                'command': command,
-                'success': result.returncode == 0,
-                'stdout': result.stdout,
-                'stderr': result.stderr,
-                'return_code': result.returncode
-            }
+        except Exception as e:
+            return self._fail_command(command_str, e)
+    
+    async def _aexec(self, command: Union[str, List[str]], input_data: str = None,
+                     discard_stdout: bool = False) -> Dict[str, Any]:
+        """execute_command的异步版本，供execute_commands_concurrent使用"""
+        shell = isinstance(command, str)
+        command_str = command if shell else ' '.join(command)
+        try:
+            logger.info("Executing: %s", command_str)
             
-            if result.returncode == 0:
-                logger.debug(f"Command executed successfully: {command}")
+            stdin = asyncio.subprocess.PIPE if input_data is not None else None
+            stdout_target = asyncio.subprocess.DEVNULL if discard_stdout else asyncio.subprocess.PIPE
+            if shell:
+                proc = await asyncio.create_subprocess_shell(
+                    command, stdin=stdin,
+                    stdout=stdout_target, stderr=asyncio.subprocess.PIPE)
             else:
-                logger.error(f"Command failed: {command}, Error: {result.stderr}")
+                proc = await asyncio.create_subprocess_exec(
+                    *command, stdin=stdin,
+                    stdout=stdout_target, stderr=asyncio.subprocess.PIPE)
+            stdout, stderr = await proc.communicate(
+                input_data.encode() if input_data is not None else None)
             
-            self.executed_commands.append(execution_result)
-            return execution_result
+            return self._finish_command(command_str, proc.returncode,
+                                        (stdout or b'').decode(errors='replace'),
+                                        stderr.decode(errors='replace'))
             
         except Exception as e:
-            logger.error(f"Error executing command: {e}")
-            error_result = {
-                'command': command,
-                'success': False,
-                'stdout': '',
-                'stderr': str(e),
-                'return_code': -1
-            }
-            self.executed_commands.append(error_result)
-            return error_result
-    
-    def execute_commands(self, commands: List[str]) -> List[Dict[str, Any]]:
-        """执行多个OVS命令"""
-        results = []
+            return self._fail_command(command_str, e)
+    
+    def _finish_command(self, command_str: str, return_code: int, stdout: str, stderr: str) -> Dict[str, Any]:
+        """构建命令执行结果并记录历史"""
+        execution_result = {
+            'command': command_str,
+            'success': return_code == 0,
+            'stdout': stdout,
+            'stderr': stderr,
+            'return_code': return_code
+        }
         
-        for command in commands:
-            result = self.execute_command(command)
-            results.append(result)
-            
-            # 如果某个命令失败，可以选择停止或继续
-            if not result['success']:
-                logger.warning(f"Command failed, continuing with next commands...")
+        if return_code == 0:
+            logger.debug("Command executed successfully: %s", command_str)
+        else:
+            logger.error("Command failed: %s, Error: %s", command_str, stderr)
+        
+        self._record_history(execution_result)
+        return execution_result
+    
+    def _fail_command(self, command_str: str, error: Exception) -> Dict[str, Any]:
+        """构建命令执行异常的结果并记录历史"""
+        logger.error("Error executing command: %s", error)
+        error_result = {
+            'command': command_str,
+            'success': False,
+            'stdout': '',
+            'stderr': str(error),
+            'return_code': -1
+        }
+        self._record_history(error_result)
+        return error_result
+    
+    def _record_history(self, execution_result: Dict[str, Any]):
+        """记录命令执行摘要到执行历史"""
+        self.executed_commands.append({
+            'command': execution_result['command'],
+            'success': execution_result['success'],
+            'return_code': execution_result['return_code'],
+            'stderr_tail': execution_result['stderr'][-STDERR_TAIL:]
+        })
+    
+    def execute_commands(self, commands: List[Union[str, List[str]]]) -> List[Dict[str, Any]]:
+        """执行多个相互独立的OVS命令（线程池并行执行，结果顺序与commands一致）"""
+        if not commands:
+            return []
+        
+        with ThreadPoolExecutor(max_workers=min(len(commands), MAX_COMMAND_WORKERS)) as executor:
+            results = list(executor.map(self.execute_command, commands))
+        
+        # 某个命令失败时其余命令照常执行
+        failed = sum(1 for result in results if not result['success'])
+        if failed:
+            logger.warning("%d of %d commands failed", failed, len(commands))
         
         return results
     
+    def execute_commands_concurrent(self, commands: List[Union[str, List[str]]],
+                                    inputs: List[str] = None,
+                                    discard_stdout: bool = False) -> List[Dict[str, Any]]:
+        """并发执行多个相互独立的OVS命令（如针对不同交换机的命令）
+        
+        inputs与commands一一对应，作为各命令的stdin；结果顺序与commands一致
+        """
+        if not commands:
+            return []
+        if inputs is None:
+            inputs = [None] * len(commands)
+        
+        async def run_all():
+            return await asyncio.gather(*[self._aexec(command, input_data, discard_stdout)
+                                          for command, input_data in zip(commands, inputs)])
+        
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return list(asyncio.run(run_all()))
+        
+        # 已在事件循环中时无法嵌套asyncio.run，退回顺序执行
+        return [self.execute_command(command, input_data, discard_stdout)
+                for command, input_data in zip(commands, inputs)]
+    
     def add_flow(self, switch: str, match: str, actions: str, priority: int = 1000) -> Dict[str, Any]:
         """添加流表规则"""
-        command = f"sudo ovs-ofctl add-flow {switch} '{match},priority={priority},{actions}'"
+        command = ['sudo', 'ovs-ofctl', 'add-flow', switch, f"{match},priority={priority},{actions}"]
         return self.execute_command(command)
     
     def delete_flows(self, switch: str, match: str = None) -> Dict[str, Any]:
         """删除流表规则"""
         if match:
-            command = f"sudo ovs-ofctl del-flows {switch} '{match}'"
+            command = ['sudo', 'ovs-ofctl', 'del-flows', switch, match]
         else:
-            command = f"sudo ovs-ofctl del-flows {switch}"
+            command = ['sudo', 'ovs-ofctl', 'del-flows', switch]
         return self.execute_command(command)
     
     def dump_flows(self, switch: str) -> Dict[str, Any]:
         """转储交换机的流表"""
-        command = f"sudo ovs-ofctl dump-flows {switch}"
+        command = ['sudo', 'ovs-ofctl', 'dump-flows', switch]
         return self.execute_command(command)
     
     def dump_ports(self, switch: str) -> Dict[str, Any]:
         """转储交换机的端口信息"""
-        command = f"sudo ovs-ofctl show {switch}"
+        command = ['sudo', 'ovs-ofctl', 'show', switch]
         return self.execute_command(command)
     
     def get_switch_stats(self, switch: str) -> Dict[str, Any]:
         """获取交换机的统计信息"""
-        command = f"sudo ovs-ofctl dump-aggregate {switch}"
+        command = ['sudo', 'ovs-ofctl', 'dump-aggregate', switch]
         return self.execute_command(command)
     
     def list_switches(self) -> Dict[str, Any]:
         """列出所有OVS交换机"""
-        command = "sudo ovs-vsctl list-br"
+        command = ['sudo', 'ovs-vsctl', 'list-br']
         return self.execute_command(command)
     
     def get_port_stats(self, switch: str) -> Dict[str, Any]:
         """获取端口统计信息"""
-        command = f"sudo ovs-ofctl dump-ports {switch}"
+        command = ['sudo', 'ovs-ofctl', 'dump-ports', switch]
         return self.execute_command(command)
     
+    def _add_flows_command(self, switch: str) -> List[str]:
+        """批量下发流表的ovs-ofctl命令（规则从stdin读取）"""
+        return ['sudo', 'ovs-ofctl', '--bundle', 'add-flows', switch, '-']
+    
+    def _flow_specs_input(self, flow_specs: List[str]) -> str:
+        """将流表规则列表拼接为add-flows的stdin输入"""
+        return '\n'.join(flow_specs) + '\n'
+    
     def install_flow_rules(self, flow_rules: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """安装流表规则列表"""
-        commands = []
+        """安装流表规则列表（按交换机分组批量下发）"""
+        # 按交换机分组，保留每条规则在输入中的位置
+        switch_specs = {}
         
-        for rule in flow_rules:
+        for index, rule in enumerate(flow_rules):
             switch = rule['switch']
             in_port = rule.get('in_port', 1)
             out_port = rule.get('out_port', 2)
             priority = rule.get('priority', 1000)
             
             # 构建匹配规则
-            match = f"in_port={in_port}"
-            if 'eth_src' in rule:
-                match += f",dl_src={rule['eth_src']}"
-            if 'eth_dst' in rule:
-                match += f",dl_dst={rule['eth_dst']}"
-            if 'ip_src' in rule:
-                match += f",nw_src={rule['ip_src']}"
-            if 'ip_dst' in rule:
-                match += f",nw_dst={rule['ip_dst']}"
+            parts = [f"cookie={rule['cookie']:#x}"] if 'cookie' in rule else []
+            parts.append(f"in_port={in_port}")
+            parts.extend(f"{ofctl_key}={rule[key]}" for key, ofctl_key in _FIELD_MAP if key in rule)
+            parts.append(f"priority={priority}")
+            parts.append(f"actions=output:{out_port}")
             
-            actions = f"output:{out_port}"
-            
-            command = f"sudo ovs-ofctl add-flow {switch} '{match},priority={priority},{actions}'"
-            commands.append(command)
+            switch_specs.setdefault(switch, []).append((index, ','.join(parts)))
+        
+        # 每个交换机一次调用，各交换机并发执行；bundle要么全部成功要么全部失败，
+        # 因此该交换机上每条规则的结果与批量结果一致
+        switches = list(switch_specs)
+        batch_results = self.execute_commands_concurrent(
+            [self._add_flows_command(switch) for switch in switches],
+            [self._flow_specs_input([spec for _, spec in switch_specs[switch]]) for switch in switches])
         
-        return self.execute_commands(commands)
+        results = [None] * len(flow_rules)
+        for switch, batch_result in zip(switches, batch_results):
+            for index, spec in switch_specs[switch]:
+                results[index] = dict(batch_result, command=f"ovs-ofctl add-flow {switch} {spec}")
+        
+        return results
     
     def clear_all_flows(self, switches: List[str]) -> List[Dict[str, Any]]:
-        """清除所有交换机的流表"""
-        commands = [f"sudo ovs-ofctl del-flows {switch}" for switch in switches]
-        return self.execute_commands(commands)
+        """清除所有交换机的流表（各交换机的del-flows并发执行，stdout直接丢弃）"""
+        commands = [['sudo', 'ovs-ofctl', 'del-flows', switch] for switch in switches]
+        return self.execute_commands_concurrent(commands, discard_stdout=True)
     
     def get_execution_history(self) -> List[Dict[str, Any]]:
-        """获取执行历史"""
-        return self.executed_commands
+        """获取执行历史（最近HISTORY_SIZE条命令摘要）"""
+        return list(self.executed_commands)
     
     def clear_execution_history(self):
         """清除执行历史"""
         self.executed_commands.clear()
+
+@functools.lru_cache(maxsize=None)
+def get_ovs_controller() -> OVSController:
+    """获取进程内共享的OVSController实例"""
+    return OVSController()
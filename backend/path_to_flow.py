@@ -5,6 +5,7 @@
 """
 
 import logging
+import zlib
 from typing import List, Dict, Any, Tuple
 
 logger = logging.getLogger(__name__)
@@ -31,17 +32,22 @@ class PathToFlow:
             # 生成唯一的flow_id
             if flow_id is None:
                 flow_id = f"flow_{path[0]}_{path[-1]}"
+            cookie = self._flow_cookie(flow_id)
             
             # 直接使用原始路径，无需扩展
-            logger.info(f"Path: {path}")
+            logger.info("Path: %s", path)
             
             # 提取交换机的输入输出端口对
             switch_port_map = {}  # {switch: {'in_port': port, 'out_port': port}}
             
+            # 沿路径走一遍，获取每对相邻节点的端口对: pairs[i] = (path[i]的端口, path[i+1]的端口)
+            pairs = [self._get_port_pair(path[i], path[i+1]) for i in range(len(path) - 1)]
+            
             # 遍历路径中的每个交换机
+            switch_nodes = self.topology_graph.switch_nodes
             for i in range(1, len(path) - 1):  # 跳过源和目的主机
                 switch = path[i]
-                if not str(switch).startswith('s'):
+                if switch not in switch_nodes:
                     continue
                 
                 # 找到前一个和后一个节点
@@ -49,10 +55,10 @@ class PathToFlow:
                 next_node = path[i+1]
                 
                 # 获取端口对
-                h1_to_s1 = self._get_port_pair(prev_node, switch)
-                s1_to_h2 = self._get_port_pair(switch, next_node)
+                h1_to_s1 = pairs[i-1]
+                s1_to_h2 = pairs[i]
                 
-                if h1_to_s1 is None or s1_to_h2 is None:
+                if None in h1_to_s1 or None in s1_to_h2:
                     logger.error(f"Cannot find ports for {prev_node}-{switch} or {switch}-{next_node}")
                     continue
                 
@@ -68,17 +74,20 @@ class PathToFlow:
                 if switch_in_port == 0 or switch_out_port == 0:
                     logger.warning(f"Invalid port values: in_port={switch_in_port}, out_port={switch_out_port}")
                     
-                logger.debug(f"Switch {switch}: in_port={switch_in_port} (from {prev_node}), out_port={switch_out_port} (to {next_node})")
+                logger.debug("Switch %s: in_port=%s (from %s), out_port=%s (to %s)",
+                             switch, switch_in_port, prev_node, switch_out_port, next_node)
                 
                 switch_port_map[switch] = {
                     'in_port': switch_in_port,   # s1接收来自h1的端口
                     'out_port': switch_out_port  # s1发送到h2的端口
                 }
             
-            logger.info(f"Switch port map: {switch_port_map}")
+            logger.info("Switch port map: %s", switch_port_map)
             
             # 为每个交换机生成双向流表规则
             flow_rules = []
+            # 反向路径只构建一次，所有反向规则共享（下游只读取path）
+            reverse_path = path[::-1]
             
             for switch, ports in switch_port_map.items():
                 in_port = ports['in_port']
@@ -92,7 +101,8 @@ class PathToFlow:
                     'out_port': out_port,
                     'priority': priority,
                     'path': path,
-                    'direction': 'forward'
+                    'direction': 'forward',
+                    'cookie': cookie
                 }
                 
                 # 反向流表规则（从目的到源）
@@ -102,8 +112,9 @@ class PathToFlow:
                     'in_port': out_port,
                     'out_port': in_port,
                     'priority': priority,
-                    'path': list(reversed(path)),
-                    'direction': 'reverse'
+                    'path': reverse_path,
+                    'direction': 'reverse',
+                    'cookie': cookie
                 }
                 
                 flow_rules.extend([rule1, rule2])
@@ -111,36 +122,28 @@ class PathToFlow:
             # 存储流表规则
             self.active_flows[flow_id] = flow_rules
             
-            logger.info(f"Created {len(flow_rules)} flow rules for path: {path}")
+            logger.info("Created %d flow rules for path: %s", len(flow_rules), path)
             return flow_rules
             
         except Exception as e:
             logger.error(f"Error creating flow rules: {e}")
             return []
     
+    def _flow_cookie(self, flow_id: str) -> int:
+        """由flow_id得到稳定的OpenFlow cookie，同一路径的所有规则共用，便于按cookie删除"""
+        return zlib.crc32(flow_id.encode())
+    
     def generate_ovs_commands(self, flow_rules: List[Dict[str, Any]]) -> List[str]:
-        """生成ovs-ofctl命令"""
+        """生成ovs-ofctl命令（只处理交换机，跳过主机）"""
         try:
-            commands = []
+            switch_nodes = self.topology_graph.switch_nodes
+            commands = [f"sudo ovs-ofctl add-flow {rule['switch']} "
+                        f"'cookie={rule.get('cookie', 0):#x},in_port={rule['in_port']},"
+                        f"priority={rule['priority']},actions=output:{rule['out_port']}'"
+                        for rule in flow_rules if rule['switch'] in switch_nodes]
             
-            for rule in flow_rules:
-                switch = rule['switch']
-                
-                # 只处理交换机，跳过主机
-                if not str(switch).startswith('s'):
-                    logger.warning(f"Skipping non-switch device: {switch}")
-                    continue
-                    
-                in_port = rule['in_port']
-                out_port = rule['out_port']
-                priority = rule['priority']
-                
-                # 构建OpenFlow规则
-                match = f"in_port={in_port}"
-                actions = f"actions=output:{out_port}"
-                
-                cmd = f"sudo ovs-ofctl add-flow {switch} '{match},priority={priority},{actions}'"
-                commands.append(cmd)
+            if len(commands) != len(flow_rules):
+                logger.warning(f"Skipped {len(flow_rules) - len(commands)} rules for non-switch devices")
             
             logger.info(f"Generated {len(commands)} ovs-ofctl commands")
             return commands
@@ -149,24 +152,27 @@ class PathToFlow:
             logger.error(f"Error generating ovs commands: {e}")
             return []
     
-    def delete_flow_rules(self, flow_id: str) -> List[str]:
-        """删除指定路径的流表规则"""
+    def delete_flow_rules(self, flow_id: str) -> List[List[str]]:
+        """删除指定路径的流表规则，返回各交换机的del-flows命令（argv列表，不经过shell）"""
         try:
             if flow_id not in self.active_flows:
                 logger.warning(f"Flow ID {flow_id} not found")
                 return []
             
             flow_rules = self.active_flows[flow_id]
+            cookie = self._flow_cookie(flow_id)
             commands = []
+            seen_switches = set()
             
             for rule in flow_rules:
                 switch = rule['switch']
-                in_port = rule['in_port']
+                if switch in seen_switches:
+                    continue
+                seen_switches.add(switch)
                 
-                # 删除对应的流表规则
-                # 这里使用简单的匹配条件删除
-                cmd = f"sudo ovs-ofctl del-flows {switch} in_port={in_port}"
-                commands.append(cmd)
+                # 同一交换机上该路径的正反向规则共用cookie，一条命令即可全部删除，
+                # 且不会误删其他路径经过相同in_port的规则
+                commands.append(['sudo', 'ovs-ofctl', 'del-flows', switch, f"cookie={cookie:#x}/-1"])
             
             # 从活跃流表中移除
             del self.active_flows[flow_id]
@@ -188,29 +194,19 @@ class PathToFlow:
             # 首先尝试从原始链路信息获取
             raw_ports = self.topology_graph.get_port_pair_from_raw_links(node1, node2)
             if raw_ports and raw_ports[0] is not None and raw_ports[1] is not None:
-                logger.debug(f"使用原始链路信息: {node1}:{raw_ports[0]} -> {node2}:{raw_ports[1]}")
+                logger.debug("使用原始链路信息: %s:%s -> %s:%s", node1, raw_ports[0], node2, raw_ports[1])
                 return raw_ports
             
             # 如果原始链路信息不可用，回退到NetworkX图
             logger.debug("原始链路信息不可用，回退到NetworkX图")
             
-            # 检查两个方向的边
-            edge_data = None
-            port1, port2 = None, None
-            
-            if self.topology_graph.graph.has_edge(node1, node2):
-                edge_data = self.topology_graph.graph[node1][node2]
-                port1 = edge_data.get('source_port', 1)  # node1的端口
-                port2 = edge_data.get('target_port', 1)  # node2的端口
-            elif self.topology_graph.graph.has_edge(node2, node1):
-                edge_data = self.topology_graph.graph[node2][node1]
-                port1 = edge_data.get('target_port', 1)  # node1的端口
-                port2 = edge_data.get('source_port', 1)  # node2的端口
-            else:
+            ports = self.topology_graph.get_edge_ports(node1, node2)
+            if ports is None:
                 logger.warning(f"No edge found between {node1} and {node2}")
                 return None, None
+            port1, port2 = ports
             
-            logger.debug(f"使用NetworkX图: {node1}:{port1} -> {node2}:{port2}")
+            logger.debug("使用NetworkX图: %s:%s -> %s:%s", node1, port1, node2, port2)
             return (port1, port2)
             
         except Exception as e:
@@ -232,16 +228,18 @@ class PathToFlow:
             if len(path) < 2:
                 return False, "Path must have at least 2 nodes"
             
+            graph = self.topology_graph.graph
+            
             # 检查路径中的节点是否都存在
-            for node in path:
-                if node not in self.topology_graph.graph.nodes:
-                    return False, f"Node {node} not found in topology"
+            missing = set(path).difference(graph.nodes)
+            if missing:
+                node = next(node for node in path if node in missing)
+                return False, f"Node {node} not found in topology"
             
             # 检查路径中的链路是否都存在
-            for i in range(len(path) - 1):
-                src, dst = path[i], path[i + 1]
-                if not self.topology_graph.graph.has_edge(src, dst):
-                    return False, f"No link between {src} and {dst}"
+            broken = next(((src, dst) for src, dst in zip(path, path[1:]) if not graph.has_edge(src, dst)), None)
+            if broken:
+                return False, f"No link between {broken[0]} and {broken[1]}"
             
             # 检查是否有环路
             if len(set(path)) != len(path):
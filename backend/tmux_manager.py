@@ -6,16 +6,45 @@ Tmux会话管理器
 
 import subprocess
 import os
+import shlex
+import select
+import threading
 import time
+import uuid
 import logging
 
 logger = logging.getLogger(__name__)
 
+# 轮询会话输出日志的间隔（秒）
+OUTPUT_POLL_INTERVAL = 0.05
+# 命令执行完成的标志（Mininet CLI提示符）
+PROMPT = "mininet>"
+# 会话存在性检查结果的缓存时间（秒）
+ACTIVE_CACHE_TTL = 0.5
+# 控制模式下等待单条tmux命令应答的超时（秒）
+CONTROL_TIMEOUT = 3
+
+def _tmux_quote(arg):
+    """按tmux命令语法给参数加双引号"""
+    return '"' + arg.replace('\\', '\\\\').replace('"', '\\"').replace('$', '\\$') + '"'
+
 class TmuxManager:
     def __init__(self, session_name="mininet_session", use_sudo=False):
         self.session_name = session_name
         self.session_created = False
         self.use_sudo = use_sudo
+        
+        # 通过tmux pipe-pane将会话输出追加到日志文件，send_command从中读取增量输出
+        self.log_path = f"/tmp/{session_name}.log"
+        
+        # is_session_active的缓存 (time.monotonic()时间戳, 结果)
+        self._active_cache = (0, False)
+        
+        # 常驻的tmux控制模式(-C)客户端，send-keys/capture-pane等命令经其发送，
+        # 不必每次fork sudo和tmux
+        self._control = None
+        self._control_buffer = b''
+        self._control_lock = threading.Lock()
     
     def start_session(self, command=None):
         """启动一个新的tmux会话"""
@@ -24,23 +53,21 @@ class TmuxManager:
             self._ensure_tmux_server()
             
             # 检查会话是否已存在
-            check_cmd = f"tmux has-session -t {self.session_name} 2>/dev/null"
-            result = subprocess.run(check_cmd, shell=True, capture_output=True)
-            
-            if result.returncode == 0:
+            if self.is_session_active():
                 logger.info(f"Tmux session {self.session_name} already exists")
                 return True
             
             # 创建新会话，使用绝对路径和完整环境
             if command:
                 # 确保使用bash shell
-                full_command = f"bash -c 'cd /tmp && {command}'"
-                cmd = f"tmux new-session -d -s {self.session_name} {full_command}"
+                cmd = ['tmux', 'new-session', '-d', '-s', self.session_name,
+                       'bash', '-c', f"cd /tmp && {command}"]
             else:
-                cmd = f"tmux new-session -d -s {self.session_name}"
+                cmd = ['tmux', 'new-session', '-d', '-s', self.session_name]
             
-            result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
+            result = subprocess.run(cmd, capture_output=True, text=True)
             
+            self._active_cache = (0, False)
             if result.returncode == 0:
                 self.session_created = True
                 logger.info(f"Tmux session {self.session_name} started successfully")
@@ -62,16 +89,26 @@ class TmuxManager:
     def _ensure_tmux_server(self):
         """确保tmux服务器正在运行"""
         try:
-            # 启动一个dummy会话来确保tmux服务器运行
-            dummy_cmd = "tmux start-server"
-            subprocess.run(dummy_cmd, shell=True, capture_output=True)
+            # 服务器已在运行（常见情况）时直接返回
+            if self._tmux_server_running():
+                return
+            
+            subprocess.run(['tmux', 'start-server'], capture_output=True)
             
-            # 给服务器一点时间启动
-            time.sleep(1)
+            # 短间隔轮询，服务器就绪即返回
+            for _ in range(10):
+                if self._tmux_server_running():
+                    return
+                time.sleep(0.05)
             
         except Exception as e:
             logger.warning(f"Error ensuring tmux server: {e}")
     
+    def _tmux_server_running(self):
+        """tmux服务器是否可响应"""
+        result = subprocess.run(['tmux', 'list-sessions'], capture_output=True)
+        return result.returncode == 0
+    
     def attach_session(self):
         """附加到tmux会话（供用户手动操作）"""
         try:
@@ -80,9 +117,8 @@ class TmuxManager:
                 logger.error(f"Tmux session {self.session_name} does not exist")
                 return False
                 
-            cmd = f"tmux attach-session -t {self.session_name}"
             # 在独立终端中运行
-            subprocess.Popen(cmd, shell=True)
+            subprocess.Popen(['tmux', 'attach-session', '-t', self.session_name])
             logger.info(f"Attaching to tmux session {self.session_name}")
             return True
         except Exception as e:
@@ -92,27 +128,187 @@ class TmuxManager:
     def get_session_output(self):
         """获取会话的完整输出"""
         try:
-            cmd_prefix = ['sudo'] if self.use_sudo else []
-            result = subprocess.run(cmd_prefix + ['tmux', 'capture-pane', '-p', '-t', self.session_name], 
-                                  capture_output=True, text=True)
-            return result.stdout
+            _, output = self._run_tmux(['capture-pane', '-p', '-t', self.session_name])
+            return output
         except:
             return ""
     
-    def send_command(self, command, wait=1):
-        """发送命令到会话并等待响应"""
+    def _run_tmux(self, args):
+        """执行一条tmux命令，返回 (是否成功, stdout)
+        
+        优先通过控制模式客户端发送，客户端不可用时退回独立的tmux进程
+        """
+        with self._control_lock:
+            proc = self._control_client()
+            if proc is not None:
+                try:
+                    proc.stdin.write((' '.join(_tmux_quote(arg) for arg in args) + '\n').encode())
+                    proc.stdin.flush()
+                    block = self._read_control_block(CONTROL_TIMEOUT)
+                except OSError:
+                    block = None
+                
+                if block is not None:
+                    success, lines = block
+                    return success, ''.join(line + '\n' for line in lines)
+                
+                # 应答超时或连接断开，丢弃该客户端以免后续应答错位
+                self._close_control()
+        
+        cmd_prefix = ['sudo'] if self.use_sudo else []
+        result = subprocess.run(cmd_prefix + ['tmux'] + args, capture_output=True, text=True)
+        return result.returncode == 0, result.stdout
+    
+    def _control_client(self):
+        """获取（必要时启动）控制模式客户端，会话不存在时返回None"""
+        if self._control is not None and self._control.poll() is None:
+            return self._control
+        self._close_control()
+        
+        cmd_prefix = ['sudo'] if self.use_sudo else []
         try:
-            cmd_prefix = ['sudo'] if self.use_sudo else []
+            self._control = subprocess.Popen(cmd_prefix + ['tmux', '-C', 'attach-session', '-t', self.session_name],
+                                             stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                             stderr=subprocess.DEVNULL)
+        except OSError:
+            return None
+        
+        # 连接后tmux先输出attach命令本身的%begin/%end应答块
+        if self._read_control_block(CONTROL_TIMEOUT) is None:
+            self._close_control()
+            return None
+        return self._control
+    
+    def _close_control(self):
+        """关闭控制模式客户端"""
+        proc, self._control = self._control, None
+        self._control_buffer = b''
+        if proc is None:
+            return
+        try:
+            proc.terminate()
+            proc.wait(timeout=1)
+        except Exception:
+            pass
+    
+    def _read_control_line(self, deadline):
+        """从控制模式客户端读取一行，超时或EOF时返回None"""
+        fd = self._control.stdout.fileno()
+        while b'\n' not in self._control_buffer:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return None
+            ready, _, _ = select.select([fd], [], [], remaining)
+            if not ready:
+                return None
+            data = os.read(fd, 65536)
+            if not data:
+                return None
+            self._control_buffer += data
+        
+        line, self._control_buffer = self._control_buffer.split(b'\n', 1)
+        return line.decode(errors='replace')
+    
+    def _read_control_block(self, timeout):
+        """读取下一个%begin ... %end/%error应答块，返回 (是否成功, 输出行列表)
+        
+        块外的%output等通知直接跳过；超时或客户端退出时返回None
+        """
+        deadline = time.time() + timeout
+        output = None
+        
+        while True:
+            line = self._read_control_line(deadline)
+            if line is None:
+                return None
             
+            if output is None:
+                if line.startswith('%begin'):
+                    output = []
+                elif line.startswith('%exit'):
+                    return None
+                continue
+            
+            if line.startswith('%end'):
+                return True, output
+            if line.startswith('%error'):
+                return False, output
+            output.append(line)
+    
+    def _ensure_pipe(self):
+        """确保会话面板已开启pipe-pane，把面板输出持续追加到log_path
+        
+        管道状态每次向tmux查询：会话可能被其他进程（如MininetManager）关闭并重建，
+        新会话的面板没有管道；为新会话开启管道前先清空日志，避免其无限增长
+        """
+        ok, output = self._run_tmux(['display-message', '-p', '-t', self.session_name, '#{pane_pipe}'])
+        if not ok:
+            return False
+        if output.strip() == '1':
+            return True
+        
+        # 由tmux服务器执行清空，日志可能属于运行tmux的root用户
+        quoted = shlex.quote(self.log_path)
+        self._run_tmux(['run-shell', f": > {quoted}"])
+        # -o: 面板已有管道时不重复开启
+        piping, _ = self._run_tmux(['pipe-pane', '-o', '-t', self.session_name, f"cat >> {quoted}"])
+        return piping
+    
+    def _log_size(self):
+        """日志文件当前大小（不存在时为0）"""
+        try:
+            return os.path.getsize(self.log_path)
+        except OSError:
+            return 0
+    
+    def _read_output_since(self, offset, timeout):
+        """从offset开始读取日志新增内容，出现提示符或超时后返回"""
+        output = ""
+        deadline = time.time() + timeout
+        
+        while True:
+            try:
+                with open(self.log_path, 'rb') as f:
+                    f.seek(offset)
+                    data = f.read()
+            except FileNotFoundError:
+                data = b''
+            
+            if data:
+                offset += len(data)
+                output += data.decode(errors='replace')
+                if PROMPT in output:
+                    return output
+            
+            if time.time() >= deadline:
+                return output
+            time.sleep(OUTPUT_POLL_INTERVAL)
+    
+    def send_command(self, command, wait=1):
+        """发送命令到会话并等待响应
+        
+        wait为最长等待时间：命令输出后一出现提示符即返回，不再固定等待
+        """
+        try:
             # 清空当前输出
             # self.clear_pane()
             
+            piping = self._ensure_pipe()
+            offset = self._log_size()
+            
             # 发送命令
-            subprocess.run(cmd_prefix + ['tmux', 'send-keys', '-t', self.session_name, command, 'Enter'])
+            sent, _ = self._run_tmux(['send-keys', '-t', self.session_name, command, 'Enter'])
+            if not sent:
+                # 会话不存在
+                self._active_cache = (0, False)
+                return ""
             
-            # 等待命令执行
+            if piping:
+                return self._read_output_since(offset, wait)
+            
+            # 无法开启pipe-pane时用tmux wait-for等待命令完成后截取面板
             if wait > 0:
-                time.sleep(wait)
+                self._wait_for_fence(wait)
             
             # 获取输出
             output = self.get_session_output()
@@ -121,6 +317,22 @@ class TmuxManager:
             logger.error(f"发送命令失败: {e}")
             return ""
     
+    def _wait_for_fence(self, timeout):
+        """在CLI中排队一条发送tmux信号的命令，阻塞到信号到达（最多timeout秒）
+        
+        Mininet CLI按顺序执行命令，sh命令执行时前一条命令已完成，
+        因此收到信号即说明前一条命令的输出已全部写入面板
+        """
+        cmd_prefix = ['sudo'] if self.use_sudo else []
+        channel = f"{self.session_name}_done_{uuid.uuid4().hex}"
+        
+        self._run_tmux(['send-keys', '-t', self.session_name, f"sh tmux wait-for -S {channel}", 'Enter'])
+        try:
+            subprocess.run(cmd_prefix + ['tmux', 'wait-for', channel],
+                           capture_output=True, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            logger.debug("等待命令完成超时: %s", channel)
+    
     # def clear_pane(self):
     #     """清空会话面板"""
     #     try:
@@ -145,9 +357,12 @@ class TmuxManager:
     def kill_session(self):
         """关闭tmux会话"""
         try:
-            cmd = f"tmux kill-session -t {self.session_name} 2>/dev/null"
-            result = subprocess.run(cmd, shell=True, capture_output=True)
+            result = subprocess.run(['tmux', 'kill-session', '-t', self.session_name],
+                                    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
             
+            self._active_cache = (0, False)
+            with self._control_lock:
+                self._close_control()
             if result.returncode == 0:
                 self.session_created = False
                 logger.info(f"Tmux session {self.session_name} killed")
@@ -161,10 +376,18 @@ class TmuxManager:
             return False
     
     def is_session_active(self):
-        """检查会话是否活跃"""
+        """检查会话是否活跃（结果缓存ACTIVE_CACHE_TTL秒）"""
+        timestamp, active = self._active_cache
+        if time.monotonic() - timestamp < ACTIVE_CACHE_TTL:
+            return active
+        
         try:
-            cmd = f"tmux has-session -t {self.session_name} 2>/dev/null"
-            result = subprocess.run(cmd, shell=True, capture_output=True)
-            return result.returncode == 0
+            cmd_prefix = ['sudo'] if self.use_sudo else []
+            result = subprocess.run(cmd_prefix + ['tmux', 'has-session', '-t', self.session_name],
+                                    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            active = result.returncode == 0
         except:
-            return False
\ No newline at end of file
+            active = False
+        
+        self._active_cache = (time.monotonic(), active)
+        return active
\ No newline at end of file
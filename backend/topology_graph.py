@@ -13,6 +13,9 @@ from backend.tmux_manager import TmuxManager
 
 logger = logging.getLogger(__name__)
 
+# net输出中的端口连接，如 s1-eth4:h1-eth0
+_PAIR_RE = re.compile(r'(\w+)-eth(\d+):(\w+)-eth(\d+)')
+
 class TopologyGraph:
     def __init__(self):
         self.graph = nx.Graph()
@@ -20,22 +23,32 @@ class TopologyGraph:
         self.node_info = {}     # 存储节点信息
         self.net_output = ""    # 存储原始net命令输出
         self.raw_links = []     # 存储解析后的链路信息
+        self._link_index = {}   # {(节点1, 节点2): (节点1的端口, 节点2的端口)}，两个方向都有
         self.tmux_manager = TmuxManager(session_name="mininet_session", use_sudo=True)
+        self._apsp = {}         # 全源最短路径 {源: {目的: 路径}}，拓扑重建时重新计算
+        self.switch_nodes = frozenset()  # 交换机节点名集合
+        self.host_nodes = frozenset()    # 主机节点名集合
+        self._edge_ports = {}   # 由图中的边建立的 {(u, v): (u的端口, v的端口)}，两个方向都有
     
     def extract_topology_from_mininet(self, session_name: str = "mininet_session") -> bool:
         """从Mininet CLI提取完整拓扑信息，使用net命令获取更完整的邻接表"""
         try:
-            # 等待网络完全启动
+            # 等待网络完全启动：指数退避轮询，首次就绪即返回
             max_wait = 30
-            waited = 0
+            deadline = time.time() + max_wait
+            delay = 0.05
+            session_ready = False
+            last_report = time.time()
             
-            while waited < max_wait:
-                # 检查会话是否存在
-                if not self._check_session_exists(session_name):
-                    logger.warning("Mininet会话不存在，等待启动...")
-                    time.sleep(1)
-                    waited += 1
-                    continue
+            while time.time() < deadline:
+                # 检查会话是否存在（确认存在后不再重复检查）
+                if not session_ready:
+                    session_ready = self._check_session_exists(session_name)
+                    if not session_ready:
+                        logger.warning("Mininet会话不存在，等待启动...")
+                        time.sleep(delay)
+                        delay = min(delay * 1.5, 1.0)
+                        continue
                 
                 # 使用net命令获取拓扑信息
                 net_output = self._get_net_from_mininet(session_name)
@@ -58,10 +71,11 @@ class TopologyGraph:
                         )
                         return True
                 
-                time.sleep(1)
-                waited += 1
-                if waited % 3 == 0:
-                    logger.info(f"等待网络启动... ({waited}s)")
+                time.sleep(delay)
+                delay = min(delay * 1.5, 1.0)
+                if time.time() - last_report >= 3:
+                    last_report = time.time()
+                    logger.info(f"等待网络启动... ({max_wait - (deadline - last_report):.0f}s)")
             
             logger.error("无法从Mininet CLI获取拓扑信息")
             return False
@@ -73,8 +87,7 @@ class TopologyGraph:
     def _check_session_exists(self, session_name: str) -> bool:
         """检查tmux会话是否存在"""
         try:
-            result = self.tmux_manager.send_command("dump", wait=1)
-            return result is not None and len(result.strip()) > 0
+            return self.tmux_manager.is_session_active()
         except:
             return False
     
@@ -89,12 +102,12 @@ class TopologyGraph:
                     # CLI已准备好，发送net命令
                     output = self.tmux_manager.send_command("net", wait=2)
                     if output and any(x in output for x in ['eth', 'lo:']):
-                        logger.debug(f"成功获取net输出: {len(output)}字符")
+                        logger.debug("成功获取net输出: %d字符", len(output))
                         return output
                     else:
-                        logger.debug(f"第{attempt+1}次尝试获取net输出失败")
+                        logger.debug("第%d次尝试获取net输出失败", attempt + 1)
                 else:
-                    logger.debug(f"第{attempt+1}次尝试等待CLI提示符")
+                    logger.debug("第%d次尝试等待CLI提示符", attempt + 1)
                     time.sleep(1)
             
             return ""
@@ -117,6 +130,7 @@ class TopologyGraph:
             switches = set()
             hosts = set()
             links = []
+            seen_links = set()
             
             for line in lines:
                 line = line.strip()
@@ -140,46 +154,32 @@ class TopologyGraph:
                 elif node_name.startswith('h'):
                     hosts.add(node_name)
                 
-                # 解析端口连接
-                for part in parts[1:]:
-                    if ':' in part and 'eth' in part:
-                        # 格式: s1-eth4:h1-eth0
-                        local_port, remote_info = part.split(':', 1)
-                        
-                        # 解析本地端口
-                        local_match = re.match(r'^(\w+)-eth(\d+)$', local_port)
-                        if not local_match:
-                            continue
-                        
-                        local_node = local_match.group(1)
-                        local_port_num = int(local_match.group(2))
-                        
-                        # 解析远端信息
-                        remote_match = re.match(r'^(\w+)-eth(\d+)$', remote_info)
-                        if not remote_match:
-                            continue
-                        
-                        remote_node = remote_match.group(1)
-                        remote_port_num = int(remote_match.group(2))
-                        
-                        # 避免重复添加链路（双向的）
-                        link_key = tuple(sorted([local_node, remote_node]))
-                        
-                        # 创建链路，确保端口对应关系正确
-                        if local_node < remote_node:
-                            links.append({
-                                'source': local_node,
-                                'target': remote_node,
-                                'source_port': local_port_num,
-                                'target_port': remote_port_num
-                            })
-                        else:
-                            links.append({
-                                'source': remote_node,
-                                'target': local_node,
-                                'source_port': remote_port_num,
-                                'target_port': local_port_num
-                            })
+                # 解析端口连接，格式: s1-eth4:h1-eth0
+                for match in _PAIR_RE.finditer(line):
+                    local_node, local_port_num = match.group(1), int(match.group(2))
+                    remote_node, remote_port_num = match.group(3), int(match.group(4))
+                    
+                    # net输出中每条链路在两端各出现一次，只保留第一次
+                    link_key = (local_node, remote_node) if local_node < remote_node else (remote_node, local_node)
+                    if link_key in seen_links:
+                        continue
+                    seen_links.add(link_key)
+                    
+                    # 创建链路，确保端口对应关系正确
+                    if local_node < remote_node:
+                        links.append({
+                            'source': local_node,
+                            'target': remote_node,
+                            'source_port': local_port_num,
+                            'target_port': remote_port_num
+                        })
+                    else:
+                        links.append({
+                            'source': remote_node,
+                            'target': local_node,
+                            'source_port': remote_port_num,
+                            'target_port': local_port_num
+                        })
             
             # 构建节点列表
             for switch in sorted(switches):
@@ -194,16 +194,7 @@ class TopologyGraph:
                     'ip': f'10.0.0.{host[1:]}/24'
                 })
             
-            # 去重链路
-            seen_links = set()
-            unique_links = []
-            for link in links:
-                link_key = (link['source'], link['target'])
-                if link_key not in seen_links:
-                    seen_links.add(link_key)
-                    unique_links.append(link)
-            
-            topology_info['links'] = unique_links
+            topology_info['links'] = links
             
             return topology_info
             
@@ -215,6 +206,10 @@ class TopologyGraph:
         """构建包含交换机和主机的完整图"""
         try:
             self.graph.clear()
+            self._link_index = {}
+            self._apsp = {}
+            self.switch_nodes = frozenset(switch['name'] for switch in switches)
+            self.host_nodes = frozenset(host['name'] for host in hosts)
             
             # 添加交换机节点
             for switch in switches:
@@ -230,9 +225,17 @@ class TopologyGraph:
             
             # 添加链路
             for link in links:
-                self.graph.add_edge(link['source'], link['target'],
-                                  source_port=link['source_port'],
-                                  target_port=link['target_port'])
+                source, target = link['source'], link['target']
+                source_port, target_port = link['source_port'], link['target_port']
+                self.graph.add_edge(source, target,
+                                  source=source,
+                                  source_port=source_port,
+                                  target_port=target_port)
+                self._link_index[(source, target)] = (source_port, target_port)
+                self._link_index[(target, source)] = (target_port, source_port)
+            
+            # 拓扑在两次重建之间不变，一次性计算所有节点对的最短路径
+            self._apsp = dict(nx.all_pairs_shortest_path(self.graph))
             
             # 构建端口映射
             self._build_port_mapping()
@@ -245,22 +248,21 @@ class TopologyGraph:
     def _build_port_mapping(self):
         """构建端口映射"""
         try:
-            self.port_mapping = {}
+            self.port_mapping = {node: {} for node in self.graph.nodes}
+            self._edge_ports = {}
             
-            for node in self.graph.nodes:
-                self.port_mapping[node] = {}
+            # 一次遍历所有边，同时填充两个端点的映射；
+            # 无向图中边的(u, v)顺序不一定是链路的source/target，以source属性为准
+            for u, v, edge_data in self.graph.edges(data=True):
+                source = edge_data.get('source', u)
+                target = v if source == u else u
+                source_port = edge_data.get('source_port', 1)
+                target_port = edge_data.get('target_port', 1)
                 
-                # 获取节点的所有连接
-                for neighbor in self.graph.neighbors(node):
-                    edge_data = self.graph[node][neighbor]
-                    
-                    # 确定端口映射
-                    if node == edge_data.get('source'):
-                        port = edge_data.get('source_port', 1)
-                    else:
-                        port = edge_data.get('target_port', 1)
-                    
-                    self.port_mapping[node][neighbor] = port
+                self.port_mapping[source][target] = source_port
+                self.port_mapping[target][source] = target_port
+                self._edge_ports[(source, target)] = (source_port, target_port)
+                self._edge_ports[(target, source)] = (target_port, source_port)
             
         except Exception as e:
             logger.error(f"构建端口映射失败: {e}")
@@ -268,22 +270,19 @@ class TopologyGraph:
     def get_topology_data(self) -> Dict[str, Any]:
         """获取拓扑数据用于GUI显示"""
         try:
-            nodes = []
-            edges = []
-            
-            for node in self.graph.nodes:
-                node_data = self.graph.nodes[node]
-                nodes.append({
-                    'id': node,
-                    'type': node_data.get('type', 'unknown'),
-                    'ip': node_data.get('ip', '')
-                })
+            nodes = [{
+                'id': node,
+                'type': node_data.get('type', 'unknown'),
+                'ip': node_data.get('ip', '')
+            } for node, node_data in self.graph.nodes(data=True)]
             
-            for edge in self.graph.edges:
-                edge_data = self.graph[edge[0]][edge[1]]
+            edges = []
+            for u, v, edge_data in self.graph.edges(data=True):
+                # 按链路原始方向输出，保证端口与source/target对应
+                source = edge_data.get('source', u)
                 edges.append({
-                    'source': edge[0],
-                    'target': edge[1],
+                    'source': source,
+                    'target': v if source == u else u,
                     'source_port': edge_data.get('source_port', 1),
                     'target_port': edge_data.get('target_port', 1)
                 })
@@ -299,56 +298,61 @@ class TopologyGraph:
             return {'nodes': [], 'edges': [], 'port_mapping': {}}
     
     def find_path(self, src: str, dst: str, algorithm: str = 'dijkstra') -> List[str]:
-        """计算从源到目的的路径"""
+        """计算从源到目的的路径（查询拓扑构建时预计算的最短路径）"""
         try:
             if src not in self.graph or dst not in self.graph:
                 logger.error(f"节点不存在: {src} 或 {dst}")
                 return []
             
-            if algorithm == 'dijkstra':
-                try:
-                    path = nx.shortest_path(self.graph, src, dst)
-                    return path
-                except nx.NetworkXNoPath:
-                    logger.error(f"从 {src} 到 {dst} 无可用路径")
-                    return []
+            if algorithm in ('dijkstra', 'bfs'):
+                # 链路无权重，最短路径即BFS路径
+                path = self._apsp.get(src, {}).get(dst)
+            elif algorithm == 'dfs':
+                path = self._dfs_path(src, dst)
+            else:
+                logger.error(f"不支持的路径算法: {algorithm}")
+                return []
             
-            return []
+            if path is None:
+                logger.error(f"从 {src} 到 {dst} 无可用路径")
+                return []
+            return list(path)
             
         except Exception as e:
             logger.error(f"计算路径失败: {e}")
             return []
     
+    def _dfs_path(self, src: str, dst: str):
+        """沿以src为根的深度优先搜索树得到到dst的路径，不可达时返回None"""
+        predecessors = nx.dfs_predecessors(self.graph, src)
+        if dst not in predecessors:
+            return None
+        
+        path = [dst]
+        while path[-1] != src:
+            path.append(predecessors[path[-1]])
+        path.reverse()
+        return path
+    
+    def get_edge_ports(self, node1: str, node2: str):
+        """从图的边获取两个节点间的端口对 (node1的端口, node2的端口)，不存在时返回None"""
+        return self._edge_ports.get((node1, node2))
+    
     def get_port_pair_from_raw_links(self, node1: str, node2: str) -> tuple:
         """从原始链路信息中获取两个节点间的端口对
         
         返回 (node1的端口, node2的端口)
-        直接从net_output中查找匹配的链路
+        从net_output解析出的链路建立的索引中直接查找
         """
-        try:
-            if not self.raw_links:
-                logger.warning("没有可用的原始链路信息")
-                return None, None
-            
-            # 在原始链路中查找匹配的边
-            for link in self.raw_links:
-                source = link['source']
-                target = link['target']
-                
-                # 检查正向边
-                if source == node1 and target == node2:
-                    return (link['source_port'], link['target_port'])
-                
-                # 检查反向边
-                elif source == node2 and target == node1:
-                    return (link['target_port'], link['source_port'])
-            
-            logger.warning(f"在原始链路中未找到 {node1} 和 {node2} 之间的连接")
+        if not self._link_index:
+            logger.warning("没有可用的原始链路信息")
             return None, None
-            
-        except Exception as e:
-            logger.error(f"从原始链路获取端口对失败: {e}")
+        
+        ports = self._link_index.get((node1, node2))
+        if ports is None:
+            logger.warning(f"在原始链路中未找到 {node1} 和 {node2} 之间的连接")
             return None, None
+        return ports
     
     # def get_raw_topology_info(self) -> Dict[str, Any]:
     #     """获取原始拓扑信息，包括net输出和链路信息"""
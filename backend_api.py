@@ -5,43 +5,94 @@
 """
 
 import logging
+import functools
+import itertools
 import json
 import os
+import platform
+import shutil
+import subprocess
+import threading
 from typing import Dict, List, Any, Optional
 
 # 导入所有后端模块
 from backend.mininet_manager import MininetManager
 from backend.topology_graph import TopologyGraph
 from backend.path_to_flow import PathToFlow
-from backend.ovs_controller import OVSController
+from backend.ovs_controller import get_ovs_controller
 from backend.monitor import NetworkMonitor
 from backend.tmux_manager import TmuxManager
 
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-
 logger = logging.getLogger(__name__)
 
-class BackendAPI:
-    """后端API主类，为前端提供统一的接口"""
+# 日志格式：时间戳直接输出浮点秒数，免去每条日志的strftime
+_LOG_FORMATTER = logging.Formatter('%(created).6f - %(name)s - %(levelname)s - %(message)s')
+
+def configure_logging(level=logging.INFO):
+    """为根日志器配置控制台输出
     
-    def __init__(self):
-        self.mininet_manager = MininetManager()
-        self.topology_graph = TopologyGraph()
-        self.path_to_flow = PathToFlow(self.topology_graph)
-        self.ovs_controller = OVSController()
-        self.monitor = NetworkMonitor()
+    仅在作为程序运行时调用；作为库导入时不改动日志配置，根日志器已有处理器时也不重复配置
+    """
+    root = logging.getLogger()
+    if root.handlers:
+        return
+    handler = logging.StreamHandler()
+    handler.setFormatter(_LOG_FORMATTER)
+    root.addHandler(handler)
+    root.setLevel(level)
+
+# 附加到Mininet CLI的命令
+CLI_ATTACH_CMD = "sudo tmux attach-session -t mininet_session"
+
+@functools.lru_cache(maxsize=None)
+def _find_terminal_command():
+    """确定自动打开CLI终端所用的命令，当前系统无可用终端时返回None
+    
+    首次需要打开终端时才探测一次，之后直接复用结果；
+    仅作为库导入时不会遍历PATH
+    """
+    system = platform.system()
+    
+    if system == "Linux":
+        terminals = [
+            ['gnome-terminal', '--', 'bash', '-c', CLI_ATTACH_CMD],
+            ['konsole', '-e', 'bash', '-c', CLI_ATTACH_CMD],
+            ['xfce4-terminal', '-e', 'bash', '-c', CLI_ATTACH_CMD],
+            ['xterm', '-e', CLI_ATTACH_CMD],
+            ['terminator', '-e', 'bash', '-c', CLI_ATTACH_CMD]
+        ]
+        return next((terminal_cmd for terminal_cmd in terminals if shutil.which(terminal_cmd[0])), None)
+    
+    if system == "Darwin":
+        apple_script = f'''
+        tell application "Terminal"
+            do script "{CLI_ATTACH_CMD}"
+            activate
+        end tell
+        '''
+        return ['osascript', '-e', apple_script]
+    
+    # Windows或其他系统
+    return None
+
+def _open_cli_terminal() -> bool:
+    """在新终端中附加到Mininet CLI，返回是否成功打开"""
+    try:
+        terminal_command = _find_terminal_command()
+        if terminal_command:
+            subprocess.Popen(terminal_command)
+            logger.info(f"已自动打开Mininet CLI终端({terminal_command[0]})")
+            return True
         
-        self.is_experiment_running = False
-        self.current_topology = None
-        self.active_paths = {}
+        logger.warning(f"无法自动打开CLI终端，请手动执行命令: {CLI_ATTACH_CMD}")
+        return False
+        
+    except Exception as cli_e:
+        logger.warning(f"自动打开CLI窗口失败: {cli_e}")
+        return False
 
-    def _create_default_simple_py(self):
-        """创建默认的simple.py拓扑文件"""
-        default_content = '''#!/usr/bin/env python3
+# 默认simple.py拓扑文件的内容
+_SIMPLE_PY_BYTES = '''#!/usr/bin/env python3
 """
 默认的简单拓扑示例
 包含一个交换机和两个主机
@@ -75,9 +126,41 @@ def run():
 if __name__ == '__main__':
     setLogLevel('info')
     run()
-'''
-        with open('simple.py', 'w') as f:
-            f.write(default_content)
+'''.encode()
+
+class BackendAPI:
+    """后端API主类，为前端提供统一的接口"""
+    
+    def __init__(self):
+        self.mininet_manager = MininetManager()
+        self.topology_graph = TopologyGraph()
+        self.path_to_flow = PathToFlow(self.topology_graph)
+        self.ovs_controller = get_ovs_controller()
+        self.monitor = NetworkMonitor(ovs_controller=self.ovs_controller)
+        
+        self.is_experiment_running = False
+        self.current_topology = None
+        self.active_paths = {}
+        self._active_path_ids = ()  # active_paths键的快照，路径增删时更新
+        self._path_seq = itertools.count()  # 路径编号，单调递增，删除路径后也不会重复
+        
+        # 拓扑代数：拓扑发生变化（启动/停止实验、加载拓扑）时递增，
+        # current_topology在代数不变期间直接复用，无需重新从Mininet提取
+        self._topo_gen = 0
+        self._topo_cache_gen = None
+        
+        # 路径计算结果缓存，键中带拓扑代数，拓扑变化后旧结果自然失效
+        self._cached_path = functools.lru_cache(maxsize=1024)(self._compute_path)
+        
+        # get_system_info的网桥列表缓存 ((实验运行状态, 拓扑代数), 网桥列表)
+        self._switches_cache = (None, None)
+
+    def _create_default_simple_py(self):
+        """创建默认的simple.py拓扑文件（先写临时文件再原子替换，避免读到写了一半的文件）"""
+        tmp_path = f"simple.py.{os.getpid()}"
+        with open(tmp_path, 'wb') as f:
+            f.write(_SIMPLE_PY_BYTES)
+        os.replace(tmp_path, 'simple.py')
     
     # Mininet管理接口
     def start_experiment(self, topology_data: dict = None) -> Dict[str, Any]:
@@ -96,76 +179,23 @@ if __name__ == '__main__':
             
             if success:
                 self.is_experiment_running = True
+                self._topo_gen += 1
                 
                 # 立即提取拓扑信息
                 if self.topology_graph.extract_topology_from_mininet():
                     self.current_topology = self.topology_graph.get_topology_data()
+                    self._topo_cache_gen = self._topo_gen
                 
                 logger.info("Experiment started successfully with topology data")
                 
                 # 自动打开CLI窗口
-                try:
-                    import subprocess
-                    import platform
-                    import shutil
-                    
-                    cmd = "sudo tmux attach-session -t mininet_session"
-                    
-                    def open_terminal_linux():
-                        """Linux系统终端打开"""
-                        terminals = [
-                            ['gnome-terminal', '--', 'bash', '-c', cmd],
-                            ['konsole', '-e', 'bash', '-c', cmd],
-                            ['xfce4-terminal', '-e', 'bash', '-c', cmd],
-                            ['xterm', '-e', cmd],
-                            ['terminator', '-e', 'bash', '-c', cmd]
-                        ]
-                        
-                        for terminal_cmd in terminals:
-                            try:
-                                if shutil.which(terminal_cmd[0]):
-                                    subprocess.Popen(terminal_cmd)
-                                    logger.info(f"已自动打开Mininet CLI终端({terminal_cmd[0]})")
-                                    return True
-                            except Exception as e:
-                                logger.debug(f"尝试{terminal_cmd[0]}失败: {e}")
-                                continue
-                        return False
-                    
-                    def open_terminal_mac():
-                        """macOS系统终端打开"""
-                        try:
-                            apple_script = f'''
-                            tell application "Terminal"
-                                do script "{cmd}"
-                                activate
-                            end tell
-                            '''
-                            subprocess.Popen(['osascript', '-e', apple_script])
-                            logger.info("已自动打开Mininet CLI终端(Terminal.app)")
-                            return True
-                        except Exception as e:
-                            logger.debug(f"macOS终端打开失败: {e}")
-                            return False
-                    
-                    if platform.system() == "Linux":
-                        if not open_terminal_linux():
-                            logger.warning("所有Linux终端尝试失败，请手动执行命令")
-                    elif platform.system() == "Darwin":
-                        if not open_terminal_mac():
-                            logger.warning("macOS终端打开失败，请手动执行命令")
-                    else:
-                        # Windows或其他系统
-                        logger.info("CLI终端自动打开功能在此系统上不可用，请手动执行命令")
-                            
-                except Exception as cli_e:
-                    logger.warning(f"自动打开CLI窗口失败: {cli_e}")
+                cli_opened = _open_cli_terminal()
                 
                 return {
                     'success': True,
                     'message': 'Experiment started with topology data',
                     'topology': self.current_topology,
-                    'cli_auto_opened': True
+                    'cli_auto_opened': cli_opened
                 }
             else:
                 return {'success': False, 'error': 'Failed to start Mininet with topology data'}
@@ -181,8 +211,7 @@ if __name__ == '__main__':
                 return {'success': False, 'error': 'No experiment running'}
             
             # 清除所有交换机的流表（只清理交换机，不包括主机）
-            switches = [node for node in self.topology_graph.graph.nodes() 
-                       if node.startswith('s')]
+            switches = list(self.topology_graph.switch_nodes)
             if switches:
                 self.ovs_controller.clear_all_flows(switches)
             
@@ -193,6 +222,8 @@ if __name__ == '__main__':
                 self.is_experiment_running = False
                 self.current_topology = None
                 self.active_paths.clear()
+                self._active_path_ids = ()
+                self._topo_gen += 1
                 
                 logger.info("Experiment stopped successfully")
                 return {'success': True, 'message': 'Experiment stopped'}
@@ -208,7 +239,7 @@ if __name__ == '__main__':
         return {
             'is_running': self.is_experiment_running,
             'topology': self.current_topology,
-            'active_paths': list(self.active_paths.keys()),
+            'active_paths': self._active_path_ids,
             'mininet_status': self.mininet_manager.get_status()
         }
     
@@ -219,8 +250,18 @@ if __name__ == '__main__':
             return {'success': False, 'error': 'No experiment running'}
         
         try:
+            # 拓扑未变化时直接返回上次提取的结果
+            if self._topo_cache_gen == self._topo_gen and self.current_topology is not None:
+                return {
+                    'success': True,
+                    'topology': self.current_topology
+                }
+            
             if self.topology_graph.extract_topology_from_mininet():
+                # 图已重新构建，之前按旧图缓存的路径结果（包括失败结果）全部失效
+                self._topo_gen += 1
                 self.current_topology = self.topology_graph.get_topology_data()
+                self._topo_cache_gen = self._topo_gen
                 return {
                     'success': True,
                     'topology': self.current_topology
@@ -246,7 +287,9 @@ if __name__ == '__main__':
         try:
             success = self.topology_graph.load_topology(filename)
             if success:
+                self._topo_gen += 1
                 self.current_topology = self.topology_graph.get_topology_data()
+                self._topo_cache_gen = self._topo_gen
                 return {
                     'success': True,
                     'topology': self.current_topology
@@ -271,24 +314,19 @@ if __name__ == '__main__':
                 return {'success': False, 'error': message}
             
             # 生成路径ID
-            path_id = f"path_{path[0]}_{path[-1]}_{len(self.active_paths)}"
+            path_id = f"path_{path[0]}_{path[-1]}_{next(self._path_seq)}"
             
             # 创建流表规则
             flow_rules = self.path_to_flow.create_flow_rules(path, path_id)
             if not flow_rules:
                 return {'success': False, 'error': 'Failed to create flow rules'}
             
-            # 生成OVS命令
-            commands = self.path_to_flow.generate_ovs_commands(flow_rules)
-            if not commands:
-                return {'success': False, 'error': 'Failed to generate commands'}
-            
-            # 执行命令
-            results = self.ovs_controller.execute_commands(commands)
+            # 按交换机分组，每个交换机一次 ovs-ofctl --bundle add-flows，各交换机并发执行
+            results = self.ovs_controller.install_flow_rules(flow_rules)
             
-            # 检查执行结果
-            failed_commands = [r for r in results if not r['success']]
-            if failed_commands:
+            # 检查执行结果（全部成功时不构建失败列表）
+            if not all(r['success'] for r in results):
+                failed_commands = [r for r in results if not r['success']]
                 return {
                     'success': False,
                     'error': f'Failed to install {len(failed_commands)} flow rules',
@@ -301,6 +339,7 @@ if __name__ == '__main__':
                 'flow_rules': flow_rules,
                 'algorithm': algorithm
             }
+            self._active_path_ids = (*self._active_path_ids, path_id)
             
             logger.info(f"Path created: {path} (ID: {path_id})")
             return {
@@ -326,9 +365,9 @@ if __name__ == '__main__':
             # 执行命令
             results = self.ovs_controller.execute_commands(commands)
             
-            # 检查执行结果
-            failed_commands = [r for r in results if not r['success']]
-            if failed_commands:
+            # 检查执行结果（全部成功时不构建失败列表）
+            if not all(r['success'] for r in results):
+                failed_commands = [r for r in results if not r['success']]
                 return {
                     'success': False,
                     'error': f'Failed to delete {len(failed_commands)} flow rules',
@@ -337,6 +376,7 @@ if __name__ == '__main__':
             
             # 移除路径信息
             path_info = self.active_paths.pop(path_id)
+            self._active_path_ids = tuple(self.active_paths)
             
             logger.info(f"Path deleted: {path_id}")
             return {
@@ -355,7 +395,7 @@ if __name__ == '__main__':
             if not self.is_experiment_running:
                 return {'success': False, 'error': 'No experiment running'}
             
-            path = self.path_to_flow.calculate_path(src, dst, algorithm)
+            path = list(self._cached_path(src, dst, algorithm, self._topo_gen))
             if path:
                 return {
                     'success': True,
@@ -369,6 +409,10 @@ if __name__ == '__main__':
             logger.error(f"Error calculating path: {e}")
             return {'success': False, 'error': str(e)}
     
+    def _compute_path(self, src: str, dst: str, algorithm: str, topo_gen: int) -> tuple:
+        """计算路径，返回tuple以便缓存（topo_gen只参与缓存键）"""
+        return tuple(self.path_to_flow.calculate_path(src, dst, algorithm))
+    
     def get_active_paths(self) -> Dict[str, Any]:
         """获取所有活跃路径"""
         return {
@@ -377,13 +421,14 @@ if __name__ == '__main__':
         }
     
     # 监控接口
-    def start_monitoring(self, switches: List[str] = None, interval: int = 5) -> Dict[str, Any]:
-        """开始监控"""
+    def start_monitoring(self, switches: List[str] = None, interval: int = 5,
+                         data_file: str = None) -> Dict[str, Any]:
+        """开始监控（指定data_file时监控样本以JSON-lines流式写入该文件）"""
         try:
             if not switches:
-                switches = list(self.topology_graph.graph.nodes())
+                switches = sorted(self.topology_graph.switch_nodes)
             
-            self.monitor.start_monitoring(switches, interval)
+            self.monitor.start_monitoring(switches, interval, data_file)
             return {'success': True, 'message': f'Started monitoring {len(switches)} switches'}
             
         except Exception as e:
@@ -402,8 +447,7 @@ if __name__ == '__main__':
     def get_monitoring_data(self) -> Dict[str, Any]:
         """获取监控数据"""
         try:
-            data = self.monitor.collect_all_stats()
-            summary = self.monitor.get_monitoring_summary()
+            data, summary = self.monitor.collect_and_summarize()
             
             return {
                 'success': True,
@@ -415,6 +459,42 @@ if __name__ == '__main__':
             logger.error(f"Error getting monitoring data: {e}")
             return {'success': False, 'error': str(e)}
     
+    def get_host_stats(self, host: str) -> Dict[str, Any]:
+        """获取主机网卡的收发统计
+        
+        主机网卡是veth对的一端，另一端（交换机端口sX-ethN）位于根命名空间，
+        读取交换机端的sysfs计数器并交换收发方向即为主机网卡的统计
+        """
+        try:
+            if host not in self.topology_graph.host_nodes:
+                return {'success': False, 'error': f'Host {host} not found in topology'}
+            
+            graph = self.topology_graph.graph
+            switch = next((node for node in graph.neighbors(host)
+                           if node in self.topology_graph.switch_nodes), None)
+            if switch is None:
+                return {'success': False, 'error': f'Host {host} is not connected to a switch'}
+            
+            switch_port, host_port = self.topology_graph.get_edge_ports(switch, host)
+            counters = self.monitor.read_interface_counters(f"{switch}-eth{switch_port}")
+            
+            # 交换机端的接收即主机端的发送
+            stats = {}
+            for name, value in counters.items():
+                direction, _, counter = name.partition('_')
+                stats[f"{'tx' if direction == 'rx' else 'rx'}_{counter}"] = value
+            
+            return {
+                'success': True,
+                'host': host,
+                'interface': f"{host}-eth{host_port}",
+                'stats': stats
+            }
+            
+        except Exception as e:
+            logger.error(f"Error getting host stats: {e}")
+            return {'success': False, 'error': str(e)}
+    
     def save_monitoring_data(self, filename: str) -> Dict[str, Any]:
         """保存监控数据"""
         try:
@@ -450,11 +530,15 @@ if __name__ == '__main__':
     def get_system_info(self) -> Dict[str, Any]:
         """获取系统信息"""
         try:
-            # 获取交换机列表
-            switches_result = self.ovs_controller.list_switches()
-            switches = []
-            if switches_result['success']:
-                switches = [s.strip() for s in switches_result['stdout'].split('\n') if s.strip()]
+            # 获取交换机列表（实验状态和拓扑未变化时复用上次结果）
+            cache_key = (self.is_experiment_running, self._topo_gen)
+            cached_key, switches = self._switches_cache
+            if cached_key != cache_key:
+                switches_result = self.ovs_controller.list_switches()
+                switches = []
+                if switches_result['success']:
+                    switches = [s.strip() for s in switches_result['stdout'].split('\n') if s.strip()]
+                    self._switches_cache = (cache_key, switches)
             
             return {
                 'success': True,
@@ -467,65 +551,86 @@ if __name__ == '__main__':
             logger.error(f"Error getting system info: {e}")
             return {'success': False, 'error': str(e)}
 
-# 创建全局后端实例
-backend = BackendAPI()
+# 全局后端实例：首次调用下列接口时才创建，仅导入BackendAPI类时不构建各管理器
+_backend = None
+_backend_lock = threading.Lock()
+
+def _get_backend() -> BackendAPI:
+    """获取（必要时创建）全局后端实例"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = BackendAPI()
+    return _backend
+
+def __getattr__(name):
+    """兼容旧用法：访问模块属性backend时返回惰性创建的全局实例"""
+    if name == 'backend':
+        return _get_backend()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # 导出给前端使用的接口
 def start_experiment(topology_data=None):
     """启动实验 - 基于拓扑数据（统一接口）"""
-    return backend.start_experiment(topology_data)
+    return _get_backend().start_experiment(topology_data)
 
 def stop_experiment():
     """停止实验（兼容接口）"""
-    return backend.stop_experiment()
+    return _get_backend().stop_experiment()
 
 def get_experiment_status():
     """获取实验状态（兼容接口）"""
-    return backend.get_experiment_status()
+    return _get_backend().get_experiment_status()
 
 def get_topology():
     """获取拓扑（兼容接口）"""
-    return backend.get_topology()
+    return _get_backend().get_topology()
 
 def create_path(path, algorithm='manual'):
     """创建路径（兼容接口）"""
-    return backend.create_path(path, algorithm)
+    return _get_backend().create_path(path, algorithm)
 
 def delete_path(path_id):
     """删除路径（兼容接口）"""
-    return backend.delete_path(path_id)
+    return _get_backend().delete_path(path_id)
 
 def calculate_path(src, dst, algorithm='dijkstra'):
     """计算路径（兼容接口）"""
-    return backend.calculate_path(src, dst, algorithm)
+    return _get_backend().calculate_path(src, dst, algorithm)
 
 def get_system_info():
     """获取系统信息（兼容接口）"""
-    return backend.get_system_info()
+    return _get_backend().get_system_info()
 
 def attach_to_cli():
     """附加到CLI（兼容接口）"""
-    return backend.attach_to_cli()
+    return _get_backend().attach_to_cli()
 
-def start_monitoring(switches=None, interval=5):
-    return backend.start_monitoring(switches, interval)
+def start_monitoring(switches=None, interval=5, data_file=None):
+    return _get_backend().start_monitoring(switches, interval, data_file)
 
 def stop_monitoring():
-    return backend.stop_monitoring()
+    return _get_backend().stop_monitoring()
 
 def get_monitoring_data():
-    return backend.get_monitoring_data()
+    return _get_backend().get_monitoring_data()
+
+def get_host_stats(host):
+    return _get_backend().get_host_stats(host)
 
 def save_topology(filename):
-    return backend.save_topology(filename)
+    return _get_backend().save_topology(filename)
 
 def load_topology(filename):
-    return backend.load_topology(filename)
+    return _get_backend().load_topology(filename)
 
 def save_monitoring_data(filename):
-    return backend.save_monitoring_data(filename)
+    return _get_backend().save_monitoring_data(filename)
 
 if __name__ == "__main__":
+    configure_logging()
+    
     # 测试后端功能
     print("Backend API loaded successfully")
     print("Available functions:")
@@ -6,12 +6,22 @@
 
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
+import functools
+import heapq
 import json
 import os
+import queue
 import sys
+import threading
 import logging
+from collections import defaultdict, deque
 from typing import List, Dict, Any, Optional
 
+try:
+    import orjson  # 可选：更快的JSON编解码
+except ImportError:
+    orjson = None
+
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -22,13 +32,47 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 try:
     from backend_api import BackendAPI
     BACKEND_AVAILABLE = True
-    backend_api = BackendAPI()
 except ImportError as e:
     print(f"后端模块导入失败: {e}")
     BACKEND_AVAILABLE = False
-    backend_api = None
+    BackendAPI = None
+
+# 点击命中测试的空间网格边长（像素）
+GRID_CELL = 100
+# 点击位置与节点中心的最大距离（像素）
+NODE_HIT_RADIUS = 30
+# 信息窗口最多保留的日志行数
+LOG_MAX_LINES = 2000
+# 节点类型对应的编号前缀
+NODE_ID_PREFIX = {'host': 'h', 'switch': 's'}
+
+def _grid_cell(x, y):
+    """坐标所在的网格单元"""
+    return int(x // GRID_CELL), int(y // GRID_CELL)
+
+def _segment_projection(px, py, x1, y1, x2, y2):
+    """点(px, py)在线段上的投影参数u（未截断）及点到线段距离的平方；线段长度为0时返回None"""
+    dx, dy = x2 - x1, y2 - y1
+    line_length_sq = dx * dx + dy * dy
+    if line_length_sq == 0:
+        return None
+    
+    u = ((px - x1) * dx + (py - y1) * dy) / line_length_sq
+    t = 0 if u < 0 else 1 if u > 1 else u
+    proj_x = x1 + t * dx
+    proj_y = y1 + t * dy
+    return u, (px - proj_x) ** 2 + (py - proj_y) ** 2
 
 class NetworkTopologyGUI:
+    # 各工具对应的鼠标光标
+    _CURSOR_MAP = {
+        '主机': 'circle',
+        '交换机': 'circle',
+        '链路': 'crosshair',
+        '删除': 'X_cursor',
+        None: 'arrow'
+    }
+    
     def __init__(self):
         self.root = tk.Tk()
         self.root.title("Mininet Topology & Path Planning")
@@ -37,35 +81,67 @@ class NetworkTopologyGUI:
         # 初始化状态变量
         self.experiment_running = False
         self.current_tool = None
+        self._pressed_tool = None  # 当前处于按下状态的工具按钮
         self.selected_path_mode = tk.StringVar(value="manual")
         self.nodes = []  # 存储节点信息 [{id, type, x, y}]
+        self.nodes_by_id = {}   # 节点索引 {id: node}
+        self.node_coords = {}   # 节点坐标索引 {id: (x, y)}
+        self.switches_list = []  # 按添加顺序的交换机节点
+        self.hosts_list = []     # 按添加顺序的主机节点
+        self._grid = defaultdict(list)  # 节点空间网格 {(x//GRID_CELL, y//GRID_CELL): [节点id]}，用于点击命中测试
+        self._layout_version = 0        # 节点拖动时递增
+        self._link_grid = None          # 链路空间网格，按 (_topo_version, _layout_version) 失效后惰性重建
+        self._link_grid_version = None
+        # 自动编号：各类型已释放编号的最小堆和已分配的最大编号
+        self._free_ids = {'host': [], 'switch': []}
+        self._id_watermark = {'host': 0, 'switch': 0}
         self.links = []  # 存储链路信息 [{source, target}]
+        self.adj = defaultdict(set)  # 邻接表 {节点id: {相邻节点id}}
+        self._links_by_pair = {}     # {frozenset((节点1, 节点2)): link}
+        self._topo_version = 0       # 拓扑版本号，节点或链路增删时递增
+        # 按拓扑版本缓存传给后端的拓扑数据，停止后再次启动无需重新构建
+        self._topo_payload = functools.lru_cache(maxsize=4)(self._build_topo_payload)
         self.paths = {}  # 存储路径信息
         self.selected_nodes = []  # 用于路径选择的节点序列
         self.drag_data = {"x": 0, "y": 0, "item": None, "node": None}
+        self._pending_drag = None      # 尚未处理的最新拖拽位置 (x, y)
+        self._drag_scheduled = False   # 是否已安排空闲时处理拖拽
         self.selected_tool = None
         self.canvas_objects = {}  # 存储画布对象引用
+        self._widget_state = {}   # 已设置的控件选项 {控件: {选项: 值}}，用于跳过重复的config
+        self._log_queue = deque()     # 待写入信息窗口的日志消息
+        self._log_scheduled = False   # 是否已安排空闲时写入
+        self.node_items = {}      # 节点形状画布项 {节点id: item}
+        self.item_to_node = {}    # 画布项到节点id的反向索引（形状和编号文本）
+        self.node_text_items = {} # 节点编号文本画布项 {节点id: item}
+        self.link_lines = {}      # 链路线画布项 {(source, target): item}
+        self._drawn_nodes = {}    # 已绘制节点的状态 {节点id: (type, x, y)}，用于增量重绘
+        self.adj_items = defaultdict(list)  # 节点相连的链路线 {节点id: [(线item, 对端节点id)]}
         
         # 路径相关状态变量（必须在创建GUI之前初始化）
         self.is_creating_path = False
         self.is_delete_mode = False
         self.current_path_nodes = []
         self.highlighted_path = None
-        self.active_paths = {}  # 存储所有活跃路径 {path_id: {'path': [...], 'color': '...', 'items': [...]}}
+        self.active_paths = {}  # 存储所有活跃路径 {path_id: {'path': [...], 'color': '...', 'tag': '画布标签', 'label': 'h1 -> s1 -> h2', 'segments': {(节点, 下一节点)}}}
         self.path_colors = ['red', 'blue', 'green', 'orange', 'purple', 'brown', 'pink', 'cyan']
         self.next_color_index = 0
         
-        # 初始化后端API
-        if BACKEND_AVAILABLE and backend_api is not None:
-            self.backend_api = backend_api
-        else:
-            self.backend_api = None
+        # 后台线程中后端调用的结果队列，由_drain_queue在主线程中处理
+        self._q = queue.Queue()
+        
+        # 后端API在首次使用时创建，并在后台线程中预先创建，不推迟窗口显示
+        self._backend_api = None
+        self._backend_failed = False
+        self._backend_lock = threading.Lock()
+        if BACKEND_AVAILABLE:
+            threading.Thread(target=self._get_backend, daemon=True).start()
             
         # 创建GUI组件
         self._create_gui()
         
         # 检查后端可用性
-        if not BACKEND_AVAILABLE or self.backend_api is None:
+        if not BACKEND_AVAILABLE:
             messagebox.showwarning("警告", "后端模块不可用，某些功能可能无法使用")
             
         # 绑定事件
@@ -73,6 +149,7 @@ class NetworkTopologyGUI:
         
         # 启动定时器
         self._update_status()
+        self.root.after(50, self._drain_queue)
     
     def _create_gui(self):
         """创建完整的GUI界面 - 三frame布局"""
@@ -172,34 +249,6 @@ class NetworkTopologyGUI:
         # 设置初始状态
         self.update_ui_state()
     
-    def _create_canvas(self):
-        """创建画布"""
-        canvas_frame = ttk.Frame(self.root)
-        canvas_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-        
-        # 创建滚动条
-        v_scrollbar = ttk.Scrollbar(canvas_frame, orient=tk.VERTICAL)
-        h_scrollbar = ttk.Scrollbar(canvas_frame, orient=tk.HORIZONTAL)
-        
-        # 创建画布
-        self.canvas = tk.Canvas(canvas_frame, 
-                              bg='white',
-                              yscrollcommand=v_scrollbar.set,
-                              xscrollcommand=h_scrollbar.set,
-                              scrollregion=(0, 0, 2000, 1500))
-        
-        v_scrollbar.config(command=self.canvas.yview)
-        h_scrollbar.config(command=self.canvas.xview)
-        
-        v_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        h_scrollbar.pack(side=tk.BOTTOM, fill=tk.X)
-        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        
-        # 绑定画布事件
-        self.canvas.bind("<Button-1>", self.on_canvas_click)
-        self.canvas.bind("<B1-Motion>", self.on_canvas_drag)
-        self.canvas.bind("<ButtonRelease-1>", self.on_canvas_release)
-    
     def _create_status_bar(self):
         """创建信息窗口和状态栏 - 左侧布局，高度对齐"""
         # 创建底部容器
@@ -240,6 +289,31 @@ class NetworkTopologyGUI:
         
 
     
+    @property
+    def backend_api(self):
+        """后端API实例，不可用时为None"""
+        return self._get_backend()
+    
+    def _get_backend(self):
+        """获取后端API，首次调用时创建（线程安全，创建失败后不再重试）"""
+        if self._backend_api is None and BACKEND_AVAILABLE and not self._backend_failed:
+            with self._backend_lock:
+                if self._backend_api is None and not self._backend_failed:
+                    try:
+                        self._backend_api = BackendAPI()
+                    except Exception as e:
+                        self._backend_failed = True
+                        logger.error(f"创建后端API失败: {e}")
+        return self._backend_api
+    
+    def _set(self, widget, **kw):
+        """设置控件选项，只把与上次设置不同的选项发给Tk"""
+        state = self._widget_state.setdefault(widget, {})
+        delta = {key: value for key, value in kw.items() if state.get(key) != value}
+        if delta:
+            widget.configure(**delta)
+            state.update(delta)
+    
     def _bind_events(self):
         """绑定事件"""
         self.root.bind("<Escape>", lambda e: self.select_tool(None))
@@ -249,7 +323,7 @@ class NetworkTopologyGUI:
         
         # 画布事件
         self.canvas.bind("<Button-1>", self.on_canvas_click)
-        self.canvas.bind("<B1-Motion>", self.on_canvas_drag)
+        self.canvas.bind("<B1-Motion>", self._on_drag_event)
         self.canvas.bind("<ButtonRelease-1>", self.on_canvas_release)
         self.canvas.bind("<Double-Button-1>", self.on_canvas_double_click)
         
@@ -262,44 +336,36 @@ class NetworkTopologyGUI:
     
     def select_tool(self, tool):
         """选择工具"""
-        # 重置所有按钮状态
-        for t, btn in self.tool_buttons.items():
-            if hasattr(btn, 'state'):
-                btn.state(['!pressed'])
+        # 只需恢复之前按下的按钮，再按下当前工具按钮
+        if self._pressed_tool in self.tool_buttons:
+            self.tool_buttons[self._pressed_tool].state(['!pressed'])
         
-        # 设置当前工具按钮为按下状态
         if tool in self.tool_buttons:
-            if hasattr(self.tool_buttons[tool], 'state'):
-                self.tool_buttons[tool].state(['pressed'])
+            self.tool_buttons[tool].state(['pressed'])
+        self._pressed_tool = tool
         
         self.current_tool = tool
         
         # 更新鼠标光标
-        cursor_map = {
-            '主机': 'circle',
-            '交换机': 'circle',
-            '链路': 'crosshair',
-            '删除': 'X_cursor',
-            None: 'arrow'
-        }
-        self.canvas.config(cursor=cursor_map.get(tool, 'arrow'))
+        self._set(self.canvas, cursor=self._CURSOR_MAP.get(tool, 'arrow'))
         
         if tool:
-            self.status_label.config(text=f"选择工具: {tool}")
+            self._set(self.status_label, text=f"选择工具: {tool}")
         else:
-            self.status_label.config(text="就绪")
+            self._set(self.status_label, text="就绪")
     
     def new_topology(self):
         """新建拓扑"""
-        self.canvas.delete("all")
-        self.nodes.clear()
+        self._clear_canvas()
+        self._set_nodes([])
         self.links.clear()
+        self._rebuild_adjacency()
         self.paths.clear()
         self.selected_nodes.clear()
         self.active_paths.clear()
         self.next_color_index = 0
         self.highlighted_path = None
-        self.status_label.config(text="新建拓扑")
+        self._set(self.status_label, text="新建拓扑")
         self.log_message("新建拓扑已创建")
     
     def open_topology(self):
@@ -310,12 +376,15 @@ class NetworkTopologyGUI:
         )
         if filename:
             try:
-                with open(filename, 'r') as f:
-                    data = json.load(f)
+                with open(filename, 'rb') as f:
+                    content = f.read()
+                data = orjson.loads(content) if orjson else json.loads(content)
                 
-                self.canvas.delete("all")
-                self.nodes = data.get('nodes', [])
+                # 只清除路径高亮，节点和链路由redraw_topology按差异更新
+                self.canvas.delete('path_highlight', 'temp_highlight')
+                self._set_nodes(data.get('nodes', []))
                 self.links = data.get('links', [])
+                self._rebuild_adjacency()
                 
                 # 清除现有路径
                 self.active_paths.clear()
@@ -325,7 +394,7 @@ class NetworkTopologyGUI:
                 # 重绘画布
                 self.redraw_topology()
                 
-                self.status_label.config(text=f"拓扑已加载: {filename}")
+                self._set(self.status_label, text=f"拓扑已加载: {filename}")
                 self.log_message(f"拓扑文件已加载: {filename}")
                 
             except Exception as e:
@@ -345,10 +414,15 @@ class NetworkTopologyGUI:
                     'links': self.links,
                     'paths': self.paths
                 }
-                with open(filename, 'w') as f:
-                    json.dump(data, f, indent=2)
+                # 紧凑格式，不转义中文
+                if orjson:
+                    content = orjson.dumps(data)
+                else:
+                    content = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+                with open(filename, 'wb') as f:
+                    f.write(content)
                 
-                self.status_label.config(text=f"拓扑已保存: {filename}")
+                self._set(self.status_label, text=f"拓扑已保存: {filename}")
                 self.log_message(f"拓扑文件已保存: {filename}")
                 
             except Exception as e:
@@ -371,67 +445,78 @@ class NetworkTopologyGUI:
             topology_data = self._get_topology_data_for_backend()
             self.log_message("准备启动实验，拓扑数据已准备")
             
-            # 将拓扑数据传递给后端启动实验
-            result = self.backend_api.start_experiment(topology_data)
-            if result['success']:
-                self.experiment_running = True
-                self.update_ui_state()
-                self.exp_status_label.config(text="实验运行中")
-                self.log_message("实验启动成功")
-                
-                # 实验启动成功，拓扑已在运行中，无需重新显示
-                self.log_message("实验已启动，拓扑正在运行")
-                
-                # CLI窗口已自动打开（由后端API处理）
-                self.log_message("Mininet CLI窗口已自动打开")
-                    
-            else:
-                messagebox.showerror("错误", f"启动实验失败: {result.get('error', '未知错误')}")
-                self.log_message(f"启动实验失败: {result.get('error', '未知错误')}")
+            # 将拓扑数据传递给后端启动实验（Mininet启动耗时数秒，在后台线程中执行）
+            self._set(self.start_btn, state='disabled')
+            self._set(self.status_label, text="正在启动实验...")
+            self._run_in_background(self._on_start_experiment_done,
+                                    self.backend_api.start_experiment, topology_data)
         except Exception as e:
+            self._set(self.start_btn, state='normal')
             messagebox.showerror("错误", f"启动实验失败: {e}")
             self.log_message(f"启动实验失败: {e}")
+    
+    def _on_start_experiment_done(self, result, error):
+        """启动实验的后台调用完成（主线程）"""
+        if error is None and result['success']:
+            self.experiment_running = True
+            self.update_ui_state()
+            self._set(self.exp_status_label, text="实验运行中")
+            self._set(self.status_label, text="就绪")
+            self.log_message("实验启动成功")
+            
+            # 实验启动成功，拓扑已在运行中，无需重新显示
+            self.log_message("实验已启动，拓扑正在运行")
+            
+            # CLI窗口已自动打开（由后端API处理）
+            self.log_message("Mininet CLI窗口已自动打开")
+        else:
+            message = error if error is not None else result.get('error', '未知错误')
+            self._set(self.start_btn, state='normal')
+            self._set(self.status_label, text="就绪")
+            messagebox.showerror("错误", f"启动实验失败: {message}")
+            self.log_message(f"启动实验失败: {message}")
             
     def _get_topology_data_for_backend(self):
         """将当前GUI拓扑数据转换为后端需要的格式"""
         try:
-            # 转换为后端需要的拓扑数据格式
-            topology_data = {
-                "switches": [],
-                "hosts": [],
-                "links": []
-            }
-            
-            # 添加交换机
-            for node in self.nodes:
-                if node['type'] == 'switch':
-                    switch_name = node.get('id', f's{len(topology_data["switches"])+1}')
-                    topology_data["switches"].append({
-                        "name": switch_name,
-                        "dpid": str(len(topology_data["switches"]) + 1)
-                    })
-            
-            # 添加主机
-            for node in self.nodes:
-                if node['type'] == 'host':
-                    host_name = node.get('id', f'h{len(topology_data["hosts"])+1}')
-                    topology_data["hosts"].append({
-                        "name": host_name,
-                        "ip": f"10.0.0.{len(topology_data['hosts'])+1}/24"
-                    })
-            
-            # 添加链路
-            for link in self.links:
-                topology_data["links"].append({
-                    "src": link['source'],
-                    "dst": link['target']
-                })
-            
-            return topology_data
-            
+            return self._topo_payload(self._topo_version)
         except Exception as e:
             self.log_message(f"获取拓扑数据失败: {e}")
             return None
+    
+    def _build_topo_payload(self, topo_version):
+        """构建后端拓扑数据，结果按拓扑版本号缓存（返回值只读）"""
+        # 转换为后端需要的拓扑数据格式
+        topology_data = {
+            "switches": [],
+            "hosts": [],
+            "links": []
+        }
+        
+        # 添加交换机
+        for node in self.switches_list:
+            switch_name = node.get('id', f's{len(topology_data["switches"])+1}')
+            topology_data["switches"].append({
+                "name": switch_name,
+                "dpid": str(len(topology_data["switches"]) + 1)
+            })
+        
+        # 添加主机
+        for node in self.hosts_list:
+            host_name = node.get('id', f'h{len(topology_data["hosts"])+1}')
+            topology_data["hosts"].append({
+                "name": host_name,
+                "ip": f"10.0.0.{len(topology_data['hosts'])+1}/24"
+            })
+        
+        # 添加链路
+        for link in self.links:
+            topology_data["links"].append({
+                "src": link['source'],
+                "dst": link['target']
+            })
+        
+        return topology_data
             
     def stop_experiment(self):
         """停止实验 - 调用后端API"""
@@ -440,20 +525,22 @@ class NetworkTopologyGUI:
             self.log_message("后端API不可用，无法停止实验")
             return
             
-        try:
-            result = self.backend_api.stop_experiment()
-            if result['success']:
-                self.experiment_running = False
-                self.update_ui_state()
-                self.exp_status_label.config(text="实验未启动")
-                self.log_message("实验停止成功 - 拓扑已保留")
-                # 停止实验时不清空拓扑，保留设计的拓扑以便重新启动
-            else:
-                messagebox.showerror("错误", f"停止实验失败: {result.get('error', '未知错误')}")
-                self.log_message(f"停止实验失败: {result.get('error', '未知错误')}")
-        except Exception as e:
-            messagebox.showerror("错误", f"停止实验失败: {e}")
-            self.log_message(f"停止实验失败: {e}")
+        self._set(self.stop_btn, state='disabled')
+        self._run_in_background(self._on_stop_experiment_done, self.backend_api.stop_experiment)
+    
+    def _on_stop_experiment_done(self, result, error):
+        """停止实验的后台调用完成（主线程）"""
+        if error is None and result['success']:
+            self.experiment_running = False
+            self.update_ui_state()
+            self._set(self.exp_status_label, text="实验未启动")
+            self.log_message("实验停止成功 - 拓扑已保留")
+            # 停止实验时不清空拓扑，保留设计的拓扑以便重新启动
+        else:
+            message = error if error is not None else result.get('error', '未知错误')
+            self._set(self.stop_btn, state='normal')
+            messagebox.showerror("错误", f"停止实验失败: {message}")
+            self.log_message(f"停止实验失败: {message}")
     
     def attach_to_cli(self):
         """附加到CLI - 实际打开终端窗口"""
@@ -461,30 +548,69 @@ class NetworkTopologyGUI:
             messagebox.showerror("错误", "后端API不可用")
             return
             
-        try:
-            cli_result = self.backend_api.attach_to_cli()
-            if cli_result['success']:
-                command = cli_result.get('command', 'sudo tmux attach-session -t mininet_session')
-                
-                # 实际打开终端窗口
-                import subprocess
-                import platform
-                
-                if platform.system() == "Linux":
-                    # 在Linux上打开新的终端窗口
-                    subprocess.Popen(['gnome-terminal', '--', 'bash', '-c', command])
-                    self.log_message("已打开Mininet CLI终端")
-                else:
-                    # 显示命令供用户手动执行
-                    messagebox.showinfo("CLI命令", f"请在新终端中执行以下命令：\n\n{command}")
-                    self.log_message(f"CLI命令已提供: {command}")
-            else:
-                messagebox.showerror("错误", f"无法获取CLI命令: {cli_result.get('error', '未知错误')}")
-                self.log_message(f"获取CLI命令失败: {cli_result.get('error', '未知错误')}")
-                
-        except Exception as e:
-            messagebox.showerror("错误", f"打开CLI窗口失败: {e}")
-            self.log_message(f"打开CLI窗口失败: {e}")
+        self._run_in_background(self._on_attach_to_cli_done, self._open_cli_window)
+    
+    def _open_cli_window(self):
+        """获取CLI命令并在Linux上打开终端窗口（后台线程），返回 (后端结果, 是否已打开终端)"""
+        cli_result = self.backend_api.attach_to_cli()
+        if not cli_result['success']:
+            return cli_result, False
+        
+        command = cli_result.get('command', 'sudo tmux attach-session -t mininet_session')
+        cli_result['command'] = command
+        
+        # 实际打开终端窗口
+        import subprocess
+        import platform
+        
+        if platform.system() == "Linux":
+            # 在Linux上打开新的终端窗口
+            subprocess.Popen(['gnome-terminal', '--', 'bash', '-c', command])
+            return cli_result, True
+        return cli_result, False
+    
+    def _on_attach_to_cli_done(self, result, error):
+        """附加CLI的后台调用完成（主线程）"""
+        if error is not None:
+            messagebox.showerror("错误", f"打开CLI窗口失败: {error}")
+            self.log_message(f"打开CLI窗口失败: {error}")
+            return
+        
+        cli_result, opened = result
+        if not cli_result['success']:
+            messagebox.showerror("错误", f"无法获取CLI命令: {cli_result.get('error', '未知错误')}")
+            self.log_message(f"获取CLI命令失败: {cli_result.get('error', '未知错误')}")
+        elif opened:
+            self.log_message("已打开Mininet CLI终端")
+        else:
+            # 显示命令供用户手动执行
+            command = cli_result['command']
+            messagebox.showinfo("CLI命令", f"请在新终端中执行以下命令：\n\n{command}")
+            self.log_message(f"CLI命令已提供: {command}")
+    
+    def _run_in_background(self, callback, func, *args):
+        """在后台线程中执行阻塞的后端调用，完成后在主线程中调用callback(result, error)"""
+        def _worker():
+            try:
+                self._q.put((callback, func(*args), None))
+            except Exception as e:
+                self._q.put((callback, None, e))
+        
+        threading.Thread(target=_worker, daemon=True).start()
+    
+    def _drain_queue(self):
+        """处理后台调用的结果，所有Tk控件更新都在主线程中进行"""
+        while True:
+            try:
+                callback, result, error = self._q.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                callback(result, error)
+            except Exception as e:
+                logger.error(f"处理后台调用结果失败: {e}")
+        
+        self.root.after(50, self._drain_queue)
     
     def create_path(self):
         """创建路径 - 支持手动和自动路径选择"""
@@ -502,14 +628,14 @@ class NetworkTopologyGUI:
         # 设置路径创建模式
         self.is_creating_path = True
         self.current_path_nodes = []
-        self.create_path_btn.config(state=tk.DISABLED)
+        self._set(self.create_path_btn, state=tk.DISABLED)
         
         if mode == "manual":
             self.log_message("手动路径创建模式：请按顺序点击节点（起点→中间点→终点）")
-            self.status_label.config(text="手动路径创建模式：按顺序选择节点")
+            self._set(self.status_label, text="手动路径创建模式：按顺序选择节点")
         else:
             self.log_message(f"自动路径创建模式：请选择起点和终点主机")
-            self.status_label.config(text=f"自动路径创建模式：选择{mode}算法的起点和终点")
+            self._set(self.status_label, text=f"自动路径创建模式：选择{mode}算法的起点和终点")
 
     def delete_path(self):
         """删除路径"""
@@ -524,31 +650,23 @@ class NetworkTopologyGUI:
             
         # 设置删除模式
         self.is_delete_mode = True
-        self.delete_path_btn.config(state=tk.DISABLED)
+        self._set(self.delete_path_btn, state=tk.DISABLED)
         self.log_message("路径删除模式：请点击要删除的高亮路径")
-        self.status_label.config(text="路径删除模式：点击要删除的路径")
+        self._set(self.status_label, text="路径删除模式：点击要删除的路径")
 
     def on_canvas_double_click(self, event):
         """双击画布事件处理"""
         x, y = self.canvas.canvasx(event.x), self.canvas.canvasy(event.y)
         
-        # 找到双击的节点
-        clicked_items = self.canvas.find_overlapping(x-10, y-10, x+10, y+10)
-        for item in clicked_items:
-            tags = self.canvas.gettags(item)
-            if 'host' in tags or 'switch' in tags:
-                # 获取节点信息
-                node_id = None
-                for node in self.nodes:
-                    node_x, node_y = node['x'], node['y']
-                    if abs(x - node_x) < 20 and abs(y - node_y) < 20:
-                        node_id = node['id']
-                        break
-                
-                if node_id:
-                    # 显示节点信息或编辑对话框
-                    self.log_message(f"双击节点: {node_id}")
-                    break
+        # 找到双击的节点：取最近的画布项，经反向索引得到节点
+        closest = self.canvas.find_closest(x, y, halo=10)
+        node_id = self.item_to_node.get(closest[0]) if closest else None
+        
+        if node_id:
+            node_x, node_y = self.node_coords[node_id]
+            if abs(x - node_x) < 20 and abs(y - node_y) < 20:
+                # 显示节点信息或编辑对话框
+                self.log_message(f"双击节点: {node_id}")
     
     def cancel_path_creation(self):
         """取消路径创建"""
@@ -558,13 +676,15 @@ class NetworkTopologyGUI:
         # 重置所有按钮状态
         for btn in self.tool_buttons.values():
             btn.state(['!pressed'])
+        self._pressed_tool = None
         
-        # 清除高亮状态并重绘整个拓扑
+        # 清除高亮状态，节点和链路画布项保持不变
         self.clear_path_highlight()
-        self.redraw_topology()
+        self.canvas.delete('temp_highlight')
         
         # 重置链路状态
         if hasattr(self, 'link_start') and self.link_start:
+            self.canvas.itemconfig(self.link_start, outline='black')
             self.link_start = None
         
         self.exit_path_mode()
@@ -575,43 +695,22 @@ class NetworkTopologyGUI:
         # 重置路径创建和删除模式
         if hasattr(self, 'is_creating_path'):
             self.is_creating_path = False
-            self.create_path_btn.config(state=tk.NORMAL)
+            self._set(self.create_path_btn, state=tk.NORMAL)
         
         if hasattr(self, 'is_delete_mode'):
             self.is_delete_mode = False
-            self.delete_path_btn.config(state=tk.NORMAL)
+            self._set(self.delete_path_btn, state=tk.NORMAL)
             
         self.current_tool = None
-        self.canvas.config(cursor='arrow')
+        self._set(self.canvas, cursor='arrow')
         
         # 清除绿色临时高亮，但保留红色路径高亮
         self.clear_temporary_highlights()
     
     def clear_temporary_highlights(self):
         """清除临时高亮（绿色），但保留路径高亮（红色）"""
-        # 清除绿色节点高亮
-        for node in self.nodes:
-            items = self.canvas.find_overlapping(
-                node['x']-25, node['y']-25, 
-                node['x']+25, node['y']+25
-            )
-            for item in items:
-                tags = self.canvas.gettags(item)
-                if 'host' in tags or 'switch' in tags:
-                    current_outline = self.canvas.itemcget(item, 'outline')
-                    if current_outline == 'green':  # 只清除绿色高亮
-                        self.canvas.itemconfig(item, outline='black', width=1)
-        
-        # 清除绿色链路高亮（非path_highlight标记的）
-        all_items = self.canvas.find_all()
-        for item in all_items:
-            tags = self.canvas.gettags(item)
-            if 'path_highlight' not in tags:
-                item_type = self.canvas.type(item)
-                if item_type == 'line':
-                    current_fill = self.canvas.itemcget(item, 'fill')
-                    if current_fill == 'green':  # 只清除绿色链路
-                        self.canvas.delete(item)
+        # 临时高亮均为带temp_highlight标签的覆盖项，一次删除即可
+        self.canvas.delete('temp_highlight')
 
     def highlight_path(self, path):
         """高亮显示路径（兼容旧接口）"""
@@ -624,67 +723,61 @@ class NetworkTopologyGUI:
         if not path:
             return
             
-        # 获取节点坐标映射
-        node_coords = {node['id']: (node['x'], node['y']) for node in self.nodes}
+        node_coords = self.node_coords
         
-        # 存储路径项以便后续删除
-        path_items = []
+        # 活跃路径的高亮项带有路径专属标签，删除时一次清除；
+        # 未指定path_id的预览高亮按临时高亮处理
+        if path_id and path_id in self.active_paths:
+            path_data = self.active_paths[path_id]
+            tags = ('path_highlight', path_data['tag'])
+            label = path_data['label']
+        else:
+            tags = ('temp_highlight',)
+            label = ' -> '.join(path)
         
         # 高亮路径上的所有节点
         for node_id in path:
             if node_id in node_coords:
-                items = self.highlight_node_with_color(node_id, color)
-                path_items.extend(items)
+                self.highlight_node_with_color(node_id, color, tags)
         
         # 高亮路径上的所有链路
         for i in range(len(path) - 1):
             source, target = path[i], path[i+1]
             if source in node_coords and target in node_coords:
-                line = self.highlight_link_with_color(source, target, color)
-                if line:
-                    path_items.append(line)
-        
-        # 如果提供了path_id，更新存储的路径信息
-        if path_id and path_id in self.active_paths:
-            self.active_paths[path_id]['items'] = path_items
+                self.highlight_link_with_color(source, target, color, tags)
         
         # 更新状态栏
-        self.status_label.config(text=f"路径: {' -> '.join(path)} (颜色: {color})")
-        self.log_message(f"显示路径: {' -> '.join(path)} (颜色: {color})")
+        self._set(self.status_label, text=f"路径: {label} (颜色: {color})")
+        self.log_message(f"显示路径: {label} (颜色: {color})")
     
-    def highlight_node_with_color(self, node_id, color):
+    def _path_tag(self, path_id):
+        """路径高亮项的画布标签"""
+        return f"path_{path_id}"
+    
+    def highlight_node_with_color(self, node_id, color, tags=('path_highlight',)):
         """使用指定颜色高亮单个节点，返回创建的项"""
-        items = []
-        for node in self.nodes:
-            if node['id'] == node_id:
-                items_found = self.canvas.find_overlapping(
-                    node['x']-25, node['y']-25, 
-                    node['x']+25, node['y']+25
-                )
-                for item in items_found:
-                    tags = self.canvas.gettags(item)
-                    if 'host' in tags or 'switch' in tags:
-                        # 创建高亮圆圈
-                        circle = self.canvas.create_oval(
-                            node['x']-15, node['y']-15,
-                            node['x']+15, node['y']+15,
-                            outline=color, width=3, tags=('path_highlight',)
-                        )
-                        items.append(circle)
-                        break
-        return items
-    
-    def highlight_link_with_color(self, node1, node2, color):
+        node = self.nodes_by_id.get(node_id)
+        if not node:
+            return []
+        
+        # 创建高亮圆圈
+        circle = self.canvas.create_oval(
+            node['x']-15, node['y']-15,
+            node['x']+15, node['y']+15,
+            outline=color, width=3, tags=tags
+        )
+        return [circle]
+    
+    def highlight_link_with_color(self, node1, node2, color, tags=('path_highlight',)):
         """使用指定颜色高亮两个节点之间的链路"""
-        node_coords = {node['id']: (node['x'], node['y']) for node in self.nodes}
+        node_coords = self.node_coords
         if node1 in node_coords and node2 in node_coords:
             x1, y1 = node_coords[node1]
             x2, y2 = node_coords[node2]
-            line = self.canvas.create_line(x1, y1, x2, y2, 
+            # 新建的画布项本就位于显示列表顶端，无需再逐条tag_raise
+            return self.canvas.create_line(x1, y1, x2, y2, 
                                          fill=color, width=3, 
-                                         tags=('path_highlight',))
-            self.canvas.tag_raise(line)
-            return line
+                                         tags=tags)
         return None
 
     def handle_path_creation_click(self, x, y):
@@ -708,7 +801,7 @@ class NetworkTopologyGUI:
                 self.current_path_nodes.append(node_id)
                 self.highlight_node(node_id, 'green')
                 self.log_message(f"选择起点: {node_id}")
-                self.status_label.config(text=f"已选择起点: {node_id}，请选择下一个节点")
+                self._set(self.status_label, text=f"已选择起点: {node_id}，请选择下一个节点")
             else:
                 # 检查是否重复
                 if node_id in self.current_path_nodes:
@@ -735,7 +828,7 @@ class NetworkTopologyGUI:
                     # 实时高亮当前选择的路径
                     self.highlight_path(self.current_path_nodes)
                     self.log_message(f"已选择: {node_id}")
-                    self.status_label.config(text=f"已选择: {node_id}，请选择下一个节点")
+                    self._set(self.status_label, text=f"已选择: {node_id}，请选择下一个节点")
                     
         else:  # 自动模式
             # 自动模式：只选择起点和终点
@@ -747,7 +840,7 @@ class NetworkTopologyGUI:
                 self.current_path_nodes.append(node_id)
                 self.highlight_node(node_id, 'green')
                 self.log_message(f"选择起点: {node_id}")
-                self.status_label.config(text=f"已选择起点: {node_id}，请选择终点")
+                self._set(self.status_label, text=f"已选择起点: {node_id}，请选择终点")
             elif len(self.current_path_nodes) == 1:
                 # 终点必须是主机，且不能是起点
                 if clicked_node['type'] != 'host':
@@ -761,22 +854,26 @@ class NetworkTopologyGUI:
                 self.highlight_node(node_id, 'green')
                 self.log_message(f"选择终点: {node_id}")
                 
-                # 计算路径
-                try:
-                    result = self.backend_api.calculate_path(
-                        self.current_path_nodes[0], 
-                        node_id, 
-                        mode.lower()
-                    )
-                    if result['success']:
-                        self.current_path_nodes = result['path']
-                        self.complete_path_creation()
-                    else:
-                        messagebox.showerror("错误", f"路径计算失败: {result.get('error', '未知错误')}")
-                        self.cancel_path_creation()
-                except Exception as e:
-                    messagebox.showerror("错误", f"路径计算失败: {e}")
-                    self.cancel_path_creation()
+                # 计算路径（在后台线程中执行，完成前忽略后续点击）
+                src = self.current_path_nodes[0]
+                self._set(self.status_label, text=f"正在计算路径: {src} -> {node_id}")
+                self._run_in_background(
+                    lambda result, error: self._on_calculate_path_done(src, node_id, result, error),
+                    self.backend_api.calculate_path, src, node_id, mode.lower())
+    
+    def _on_calculate_path_done(self, src, dst, result, error):
+        """自动模式路径计算完成（主线程）"""
+        # 等待期间已取消或重新开始路径创建，丢弃过期结果
+        if not self.is_creating_path or self.current_path_nodes != [src, dst]:
+            return
+        
+        if error is None and result['success']:
+            self.current_path_nodes = result['path']
+            self.complete_path_creation()
+        else:
+            message = error if error is not None else result.get('error', '未知错误')
+            messagebox.showerror("错误", f"路径计算失败: {message}")
+            self.cancel_path_creation()
 
     def handle_path_deletion_click(self, x, y):
         """处理路径删除时的画布点击"""
@@ -784,9 +881,7 @@ class NetworkTopologyGUI:
         clicked_path_info = self.find_clicked_path_at_position(x, y)
         if clicked_path_info:
             path_id, path_data = clicked_path_info
-            path = path_data['path']
-            color = path_data['color']
-            path_str = ' -> '.join(path)
+            path_str = path_data['label']
             
             if messagebox.askyesno("确认删除", f"确定要删除路径 {path_str} 吗？"):
                 try:
@@ -795,7 +890,7 @@ class NetworkTopologyGUI:
                         # 清除该路径的高亮显示
                         self.clear_specific_path(path_id)
                         self.log_message(f"删除路径: {path_str}")
-                        self.status_label.config(text=f"已删除路径: {path_str}")
+                        self._set(self.status_label, text=f"已删除路径: {path_str}")
                     else:
                         messagebox.showerror("错误", f"删除路径失败: {result.get('error', '未知错误')}")
                 except Exception as e:
@@ -806,89 +901,123 @@ class NetworkTopologyGUI:
 
     def get_node_at_position(self, x, y):
         """获取指定位置的节点"""
-        clicked_items = self.canvas.find_overlapping(x-15, y-15, x+15, y+15)
-        for item in clicked_items:
-            tags = self.canvas.gettags(item)
-            if 'host' in tags or 'switch' in tags:
-                coords = self.canvas.coords(item)
-                if coords:
-                    item_x = (coords[0] + coords[2]) / 2
-                    item_y = (coords[1] + coords[3]) / 2
-                    for node in self.nodes:
-                        if abs(node['x'] - item_x) < 1 and abs(node['y'] - item_y) < 1:
-                            return node
-        return None
-
+        return self._nearest_node(x, y, NODE_HIT_RADIUS)
+    
+    def _nearest_node(self, x, y, radius):
+        """距(x, y)小于radius的最近节点，只检查周围3x3个网格单元（radius不超过GRID_CELL）"""
+        gx, gy = _grid_cell(x, y)
+        closest = None
+        min_dist = radius ** 2
+        
+        for cx in (gx - 1, gx, gx + 1):
+            for cy in (gy - 1, gy, gy + 1):
+                for node_id in self._grid.get((cx, cy), ()):
+                    node_x, node_y = self.node_coords[node_id]
+                    dist = (node_x - x) ** 2 + (node_y - y) ** 2
+                    if dist < min_dist:
+                        min_dist = dist
+                        closest = node_id
+        
+        return self.nodes_by_id[closest] if closest else None
+    
+    def _links_near(self, x, y, radius):
+        """返回包围盒与点(x, y)周围radius范围相交的网格单元中的链路"""
+        version = (self._topo_version, self._layout_version)
+        if self._link_grid_version != version:
+            # 拓扑或布局变化后重建：每条链路登记到其包围盒覆盖的所有网格单元
+            self._link_grid = defaultdict(list)
+            for link in self.links:
+                source, target = link.get('source'), link.get('target')
+                if source not in self.node_coords or target not in self.node_coords:
+                    continue
+                (x1, y1), (x2, y2) = self.node_coords[source], self.node_coords[target]
+                gx1, gy1 = _grid_cell(min(x1, x2), min(y1, y2))
+                gx2, gy2 = _grid_cell(max(x1, x2), max(y1, y2))
+                for cx in range(gx1, gx2 + 1):
+                    for cy in range(gy1, gy2 + 1):
+                        self._link_grid[(cx, cy)].append(link)
+            self._link_grid_version = version
+        
+        gx1, gy1 = _grid_cell(x - radius, y - radius)
+        gx2, gy2 = _grid_cell(x + radius, y + radius)
+        links = {}
+        for cx in range(gx1, gx2 + 1):
+            for cy in range(gy1, gy2 + 1):
+                for link in self._link_grid.get((cx, cy), ()):
+                    links[id(link)] = link
+        return list(links.values())
+    
     def has_link_between(self, node1, node2):
         """检查两个节点之间是否有链路"""
+        return node2 in self.adj.get(node1, ())
+    
+    def _add_link(self, link):
+        """添加链路并更新邻接表"""
+        self.links.append(link)
+        self._topo_version += 1
+        self.adj[link['source']].add(link['target'])
+        self.adj[link['target']].add(link['source'])
+        self._links_by_pair[frozenset((link['source'], link['target']))] = link
+    
+    def _rebuild_adjacency(self):
+        """由self.links重建邻接表（链路整体替换后调用）"""
+        self._topo_version += 1
+        self.adj = defaultdict(set)
+        self._links_by_pair = {}
         for link in self.links:
-            if ((link['source'] == node1 and link['target'] == node2) or
-                (link['source'] == node2 and link['target'] == node1)):
-                return True
-        return False
+            self.adj[link['source']].add(link['target'])
+            self.adj[link['target']].add(link['source'])
+            self._links_by_pair[frozenset((link['source'], link['target']))] = link
 
     def highlight_node(self, node_id, color):
-        """高亮单个节点"""
-        for node in self.nodes:
-            if node['id'] == node_id:
-                items = self.canvas.find_overlapping(
-                    node['x']-25, node['y']-25, 
-                    node['x']+25, node['y']+25
-                )
-                for item in items:
-                    tags = self.canvas.gettags(item)
-                    if 'host' in tags or 'switch' in tags:
-                        self.canvas.itemconfig(item, outline=color, width=3)
-                        break
+        """高亮单个节点（临时高亮，在节点形状上叠加同形状的轮廓）"""
+        node = self.nodes_by_id.get(node_id)
+        if node:
+            x, y = node['x'], node['y']
+            create = self.canvas.create_oval if node['type'] == 'host' else self.canvas.create_rectangle
+            create(x-15, y-15, x+15, y+15, outline=color, width=3, tags=('temp_highlight',))
 
     def highlight_link(self, node1, node2, color):
         """高亮两个节点之间的链路"""
-        node_coords = {node['id']: (node['x'], node['y']) for node in self.nodes}
+        node_coords = self.node_coords
         if node1 in node_coords and node2 in node_coords:
             x1, y1 = node_coords[node1]
             x2, y2 = node_coords[node2]
-            line = self.canvas.create_line(x1, y1, x2, y2, 
-                                         fill=color, width=3, 
-                                         tags=('path_highlight',))
-            self.canvas.tag_raise(line)
+            self.canvas.create_line(x1, y1, x2, y2, 
+                                  fill=color, width=3, 
+                                  tags=('temp_highlight',))
 
     def find_clicked_path_at_position(self, x, y):
         """找到点击位置对应的路径，返回(path_id, path_data)"""
-        # 检查所有活跃路径
+        node_coords = self.node_coords
+        
+        # 只有点击位置附近的链路才可能是被点击的路径段；每条链路只计算一次点到线段的距离，
+        # 多条路径共用的链路段不再重复计算
+        hit = set()
+        for link in self._links_near(x, y, 10):
+            source, target = link['source'], link['target']
+            x1, y1 = node_coords[source]
+            x2, y2 = node_coords[target]
+            if self.is_point_on_line(x, y, x1, y1, x2, y2, tolerance=10):
+                hit.add((source, target))
+                hit.add((target, source))
+        if not hit:
+            return None
+        
+        # 检查所有活跃路径是否经过被点击的链路
         for path_id, path_data in self.active_paths.items():
-            path = path_data['path']
-            node_coords = {node['id']: (node['x'], node['y']) for node in self.nodes}
-            
-            # 检查是否点击在路径的链路上
-            for i in range(len(path) - 1):
-                source, target = path[i], path[i+1]
-                if source in node_coords and target in node_coords:
-                    x1, y1 = node_coords[source]
-                    x2, y2 = node_coords[target]
-                    
-                    # 计算点到线段的距离
-                    if self.is_point_on_line(x, y, x1, y1, x2, y2, tolerance=10):
-                        return (path_id, path_data)
+            if not hit.isdisjoint(path_data['segments']):
+                return (path_id, path_data)
         
         return None
     
     def is_point_on_line(self, px, py, x1, y1, x2, y2, tolerance=10):
-        """检查点是否在指定线段上"""
-        # 计算线段长度
-        line_length = ((x2 - x1) ** 2 + (y2 - y1) ** 2) ** 0.5
-        if line_length == 0:
-            return False
-        
-        # 计算点到线段的距离
-        u = ((px - x1) * (x2 - x1) + (py - y1) * (y2 - y1)) / (line_length ** 2)
-        if u < 0 or u > 1:
+        """检查点是否在指定线段上（投影落在线段内且距离不超过tolerance）"""
+        projection = _segment_projection(px, py, x1, y1, x2, y2)
+        if projection is None:
             return False
-        
-        intersection_x = x1 + u * (x2 - x1)
-        intersection_y = y1 + u * (y2 - y1)
-        distance = ((px - intersection_x) ** 2 + (py - intersection_y) ** 2) ** 0.5
-        
-        return distance <= tolerance
+        u, distance_sq = projection
+        return 0 <= u <= 1 and distance_sq <= tolerance * tolerance
 
     def complete_path_creation(self):
         """完成路径创建"""
@@ -912,7 +1041,10 @@ class NetworkTopologyGUI:
                     path_data = {
                         'path': self.current_path_nodes,
                         'color': color,
-                        'items': []
+                        'tag': self._path_tag(path_id),
+                        'label': path_str,
+                        # 路径经过的链路段，点击命中测试时直接与被点击的链路求交
+                        'segments': frozenset(zip(self.current_path_nodes, self.current_path_nodes[1:]))
                     }
                     self.active_paths[path_id] = path_data
                     
@@ -920,7 +1052,7 @@ class NetworkTopologyGUI:
                     self.highlight_path_with_color(self.current_path_nodes, color, path_id)
                     
                     self.log_message(f"创建路径成功: {path_str} (颜色: {color})")
-                    self.status_label.config(text=f"已创建路径: {path_str}")
+                    self._set(self.status_label, text=f"已创建路径: {path_str}")
                 else:
                     messagebox.showerror("错误", f"创建路径失败: {result.get('error', '未知错误')}")
             except Exception as e:
@@ -944,28 +1076,11 @@ class NetworkTopologyGUI:
     def clear_specific_path(self, path_id):
         """清除特定路径的高亮显示并恢复原始样式"""
         if path_id in self.active_paths:
-            # 删除该路径的所有高亮项
-            for item in self.active_paths[path_id]['items']:
-                try:
-                    self.canvas.delete(item)
-                except:
-                    pass  # 项可能已不存在
+            # 该路径的所有高亮项共用一个标签，一次删除；其他路径的高亮不受影响
+            self.canvas.delete(self.active_paths[path_id]['tag'])
             
             # 从活跃路径中移除
             del self.active_paths[path_id]
-            
-            # 重新绘制整个拓扑以恢复原始样式
-            # 注意：这不会清除其他路径的高亮，因为它们存储在active_paths中
-            self.redraw_topology()
-            
-            # 重新绘制其他活跃路径的高亮
-            for active_path_id, path_data in self.active_paths.items():
-                if active_path_id != path_id:  # 跳过刚删除的路径
-                    self.highlight_path_with_color(
-                        path_data['path'], 
-                        path_data['color'], 
-                        active_path_id
-                    )
     
     def on_canvas_click(self, event):
         """画布点击事件 - 支持节点拖拽和链路创建/删除"""
@@ -987,34 +1102,10 @@ class NetworkTopologyGUI:
             
         # 原始的画布点击逻辑（拓扑编辑模式）
         
-        x, y = self.canvas.canvasx(event.x), self.canvas.canvasy(event.y)
-        
-        # 查找点击的节点
-        clicked_items = self.canvas.find_overlapping(x-10, y-10, x+10, y+10)
-        
-        # 检查是否点击在现有节点上（用于拖拽）
-        clicked_node = None
-        clicked_item = None
-        
-        for item in clicked_items:
-            tags = self.canvas.gettags(item)
-            if 'host' in tags or 'switch' in tags:
-                # 获取节点中心坐标
-                coords = self.canvas.coords(item)
-                if coords:
-                    item_x = (coords[0] + coords[2]) / 2
-                    item_y = (coords[1] + coords[3]) / 2
-                    
-                    # 查找对应的节点数据
-                    for node in self.nodes:
-                        if abs(node['x'] - item_x) < 1 and abs(node['y'] - item_y) < 1:
-                            clicked_node = node
-                            clicked_item = item
-                            break
-                break
-        
-        # 检查是否点击在链路上
-        clicked_link = self.find_closest_link(x, y)
+        # 检查是否点击在现有节点上（用于拖拽）：由节点空间网格直接命中，
+        # 不必在画布上做区域查询再逐项查标签
+        clicked_node = self.get_node_at_position(x, y)
+        clicked_item = self.node_items.get(clicked_node['id']) if clicked_node else None
         
         if not self.current_tool:
             # 没有选中工具时，支持节点拖拽
@@ -1034,16 +1125,15 @@ class NetworkTopologyGUI:
         elif self.current_tool == "链路":
             # 创建链路 - 必须点击在节点上
             if clicked_item:
-                tags = self.canvas.gettags(clicked_item)
-                if 'host' in tags or 'switch' in tags:
-                    if hasattr(self, 'link_start') and self.link_start:
-                        # 完成链路创建
-                        self.create_link_between_items(self.link_start, clicked_item)
-                        self.link_start = None
-                    else:
-                        # 开始创建链路
-                        self.link_start = clicked_item
-                        self.canvas.itemconfig(clicked_item, outline='red')
+                if hasattr(self, 'link_start') and self.link_start:
+                    # 完成链路创建
+                    self.canvas.itemconfig(self.link_start, outline='black')
+                    self.create_link_between_items(self.link_start, clicked_item)
+                    self.link_start = None
+                else:
+                    # 开始创建链路
+                    self.link_start = clicked_item
+                    self.canvas.itemconfig(clicked_item, outline='red')
         elif self.current_tool == "删除":
             # 删除功能 - 优先删除节点，降低删除连接的灵敏度
             if clicked_node:
@@ -1064,22 +1154,7 @@ class NetworkTopologyGUI:
     
     def add_host(self, x, y):
         """添加主机"""
-        # 获取已存在的主机编号
-        existing_hosts = [n for n in self.nodes if n['type'] == 'host']
-        host_numbers = []
-        
-        for host in existing_hosts:
-            try:
-                # 提取编号，如h1 -> 1, h12 -> 12
-                num = int(host['id'][1:])
-                host_numbers.append(num)
-            except (ValueError, IndexError):
-                continue
-        
-        # 找到最小的可用编号
-        next_num = 1
-        while next_num in host_numbers:
-            next_num += 1
+        next_num = self._next_node_number('host')
         
         host_id = f"h{next_num}"
         node = {
@@ -1088,32 +1163,16 @@ class NetworkTopologyGUI:
             'x': x,
             'y': y
         }
-        self.nodes.append(node)
+        self._add_node(node)
         
         # 绘制主机
-        item = self.canvas.create_oval(x-15, y-15, x+15, y+15, fill="lightblue", tags="host")
-        text = self.canvas.create_text(x, y, text=host_id, tags="host")
+        self._draw_node(node)
         
         self.log_message(f"添加主机: {host_id}")
     
     def add_switch(self, x, y):
         """添加交换机"""
-        # 获取已存在的交换机编号
-        existing_switches = [n for n in self.nodes if n['type'] == 'switch']
-        switch_numbers = []
-        
-        for switch in existing_switches:
-            try:
-                # 提取编号，如s1 -> 1, s12 -> 12
-                num = int(switch['id'][1:])
-                switch_numbers.append(num)
-            except (ValueError, IndexError):
-                continue
-        
-        # 找到最小的可用编号
-        next_num = 1
-        while next_num in switch_numbers:
-            next_num += 1
+        next_num = self._next_node_number('switch')
         
         switch_id = f"s{next_num}"
         node = {
@@ -1122,70 +1181,47 @@ class NetworkTopologyGUI:
             'x': x,
             'y': y
         }
-        self.nodes.append(node)
+        self._add_node(node)
         
         # 绘制交换机
-        item = self.canvas.create_rectangle(x-15, y-15, x+15, y+15, fill="lightgreen", tags="switch")
-        text = self.canvas.create_text(x, y, text=switch_id, tags="switch")
+        self._draw_node(node)
         
         self.log_message(f"添加交换机: {switch_id}")
     
     def create_link_between_items(self, item1, item2):
         """在画布项之间创建链路"""
-        # 获取节点信息
-        node1 = None
-        node2 = None
-        
-        # 获取item1的坐标
-        coords1 = self.canvas.coords(item1)
-        if coords1:
-            x1, y1 = (coords1[0] + coords1[2]) / 2, (coords1[1] + coords1[3]) / 2
-            for node in self.nodes:
-                if abs(node['x'] - x1) < 20 and abs(node['y'] - y1) < 20:
-                    node1 = node
-                    break
-        
-        # 获取item2的坐标
-        coords2 = self.canvas.coords(item2)
-        if coords2:
-            x2, y2 = (coords2[0] + coords2[2]) / 2, (coords2[1] + coords2[3]) / 2
-            for node in self.nodes:
-                if abs(node['x'] - x2) < 20 and abs(node['y'] - y2) < 20:
-                    node2 = node
-                    break
+        # 通过画布项反向索引获取节点信息（画布项已删除时为None）
+        node1 = self.nodes_by_id.get(self.item_to_node.get(item1))
+        node2 = self.nodes_by_id.get(self.item_to_node.get(item2))
         
         if node1 and node2 and node1 != node2:
             # 检查是否已存在链路
-            for link in self.links:
-                if ((link['source'] == node1['id'] and link['target'] == node2['id']) or
-                    (link['source'] == node2['id'] and link['target'] == node1['id'])):
-                    return  # 链路已存在
+            if self.has_link_between(node1['id'], node2['id']):
+                return  # 链路已存在
             
             # 创建新链路
             link = {
                 'source': node1['id'],
                 'target': node2['id']
             }
-            self.links.append(link)
-            self.redraw_topology()
+            self._add_link(link)
+            self._draw_link(node1['id'], node2['id'])
             self.log_message(f"创建链路: {node1['id']} <-> {node2['id']}")
     
     def create_link(self, source_id, target_id):
         """通过节点ID创建链路"""
         if source_id != target_id:
             # 检查是否已存在链路
-            for link in self.links:
-                if ((link['source'] == source_id and link['target'] == target_id) or
-                    (link['source'] == target_id and link['target'] == source_id)):
-                    return  # 链路已存在
+            if self.has_link_between(source_id, target_id):
+                return  # 链路已存在
             
             # 创建新链路
             link = {
                 'source': source_id,
                 'target': target_id
             }
-            self.links.append(link)
-            self.redraw_topology()
+            self._add_link(link)
+            self._draw_link(source_id, target_id)
             self.log_message(f"创建链路: {source_id} <-> {target_id}")
     
     def update_links_for_node(self, node):
@@ -1198,26 +1234,186 @@ class NetworkTopologyGUI:
         # 找到点击的对象并删除
         pass
     
+    def _clear_canvas(self):
+        """清空画布及画布项索引"""
+        self.canvas.delete("all")
+        self.node_items.clear()
+        self.node_text_items.clear()
+        self.item_to_node.clear()
+        self.link_lines.clear()
+        self._drawn_nodes.clear()
+        self.adj_items.clear()
+    
+    def _draw_node(self, node):
+        """绘制节点形状和编号，并记录其画布项"""
+        x, y = node['x'], node['y']
+        node_id = node['id']
+        
+        if node['type'] == 'host':
+            item = self.canvas.create_oval(x-15, y-15, x+15, y+15, 
+                                         fill="lightblue", outline="black", width=1, 
+                                         tags=('host', node_id))
+        elif node['type'] == 'switch':
+            item = self.canvas.create_rectangle(x-15, y-15, x+15, y+15, 
+                                              fill="lightgreen", outline="black", width=1, 
+                                              tags=('switch', node_id))
+        else:
+            return
+        
+        text = self.canvas.create_text(x, y, text=node_id, 
+                                     font=('Arial', 10, 'bold'),
+                                     fill="black",
+                                     tags=('text', node_id))
+        
+        self.node_items[node_id] = item
+        self.node_text_items[node_id] = text
+        self.item_to_node[item] = node_id
+        self.item_to_node[text] = node_id
+        self._drawn_nodes[node_id] = (node['type'], x, y)
+    
+    def _draw_link(self, source, target):
+        """绘制一条链路线（置于最底层），并记录其画布项"""
+        line = self.canvas.create_line(*self.node_coords[source], *self.node_coords[target],
+                                       fill="black", width=2, tags=('link',))
+        self.canvas.tag_lower(line)
+        self.link_lines[(source, target)] = line
+        self.adj_items[source].append((line, target))
+        self.adj_items[target].append((line, source))
+        return line
+    
+    def _erase_link(self, source, target):
+        """删除一条链路线及其索引"""
+        line = self.link_lines.pop((source, target), None)
+        if line is None:
+            return
+        self.canvas.delete(line)
+        for node_id in (source, target):
+            if node_id in self.adj_items:
+                self.adj_items[node_id] = [entry for entry in self.adj_items[node_id] if entry[0] != line]
+    
+    def _erase_node(self, node_id):
+        """删除节点的画布项"""
+        for items in (self.node_items, self.node_text_items):
+            item = items.pop(node_id, None)
+            if item is not None:
+                self.canvas.delete(item)
+                self.item_to_node.pop(item, None)
+        self._drawn_nodes.pop(node_id, None)
+    
+    def _next_node_number(self, node_type):
+        """取该类型最小的可用编号：优先复用已释放的编号，否则在已分配的最大编号上加一"""
+        prefix = NODE_ID_PREFIX[node_type]
+        free = self._free_ids[node_type]
+        while free:
+            num = heapq.heappop(free)
+            # 堆中可能留有已被重新占用的编号，惰性跳过
+            if f"{prefix}{num}" not in self.nodes_by_id:
+                return num
+        
+        num = self._id_watermark[node_type] + 1
+        while f"{prefix}{num}" in self.nodes_by_id:
+            num += 1
+        return num
+    
+    def _node_number(self, node):
+        """节点id中的编号，如h12 -> 12；不是自动编号格式时返回None"""
+        prefix = NODE_ID_PREFIX.get(node['type'])
+        if not prefix or not node['id'].startswith(prefix):
+            return None
+        try:
+            num = int(node['id'][1:])
+        except ValueError:
+            return None
+        return num if num > 0 else None
+    
+    def _add_node(self, node):
+        """添加节点并更新索引"""
+        self.nodes.append(node)
+        self._topo_version += 1
+        self._index_node(node)
+    
+    def _index_node(self, node):
+        """将节点加入id/坐标索引和按类型划分的列表"""
+        self.nodes_by_id[node['id']] = node
+        self.node_coords[node['id']] = (node['x'], node['y'])
+        self._grid[_grid_cell(node['x'], node['y'])].append(node['id'])
+        num = self._node_number(node)
+        if num is not None:
+            # 跳过的编号记为可用，供之后添加节点时补齐
+            watermark = self._id_watermark[node['type']]
+            if num > watermark:
+                for gap in range(watermark + 1, num):
+                    heapq.heappush(self._free_ids[node['type']], gap)
+                self._id_watermark[node['type']] = num
+        if node['type'] == 'switch':
+            self.switches_list.append(node)
+        elif node['type'] == 'host':
+            self.hosts_list.append(node)
+    
+    def _remove_node(self, node_id):
+        """删除节点并更新索引，返回被删除的节点"""
+        node = self.nodes_by_id.pop(node_id, None)
+        if node is None:
+            return None
+        self.nodes.remove(node)
+        self._topo_version += 1
+        self._grid[_grid_cell(*self.node_coords.pop(node_id))].remove(node_id)
+        num = self._node_number(node)
+        if num is not None:
+            heapq.heappush(self._free_ids[node['type']], num)
+        if node in self.switches_list:
+            self.switches_list.remove(node)
+        elif node in self.hosts_list:
+            self.hosts_list.remove(node)
+        return node
+    
+    def _set_nodes(self, nodes):
+        """替换全部节点并重建索引"""
+        self.nodes = list(nodes)
+        self._topo_version += 1
+        self.nodes_by_id = {}
+        self.node_coords = {}
+        self._grid = defaultdict(list)
+        self._free_ids = {'host': [], 'switch': []}
+        self._id_watermark = {'host': 0, 'switch': 0}
+        self.switches_list = []
+        self.hosts_list = []
+        for node in self.nodes:
+            self._index_node(node)
+    
     def delete_node(self, node):
         """删除节点及其相关链路"""
         node_id = node['id']
         
-        # 删除与该节点相关的所有链路
-        self.links = [link for link in self.links 
-                     if link['source'] != node_id and link['target'] != node_id]
+        # 删除与该节点相关的所有链路：相关链路由邻接表直接得到
+        neighbors = self.adj.pop(node_id, ())
+        for neighbor in neighbors:
+            self.adj[neighbor].discard(node_id)
+            self._links_by_pair.pop(frozenset((node_id, neighbor)), None)
+        if neighbors:
+            self.links = [link for link in self.links 
+                         if link['source'] != node_id and link['target'] != node_id]
         
         # 从节点列表中删除
-        self.nodes = [n for n in self.nodes if n['id'] != node_id]
-        
-        # 重绘画布
-        self.redraw_topology()
+        self._remove_node(node_id)
+        
+        # 只删除该节点及其链路的画布项
+        for neighbor in neighbors:
+            self._erase_link(node_id, neighbor)
+            self._erase_link(neighbor, node_id)
+        self.adj_items.pop(node_id, None)
+        self._erase_node(node_id)
         self.log_message(f"删除节点: {node_id}")
     
     def delete_link(self, link):
         """删除链路"""
         if link in self.links:
             self.links.remove(link)
-            self.redraw_topology()
+            self._topo_version += 1
+            self.adj[link['source']].discard(link['target'])
+            self.adj[link['target']].discard(link['source'])
+            self._links_by_pair.pop(frozenset((link['source'], link['target'])), None)
+            self._erase_link(link['source'], link['target'])
             self.log_message(f"删除链路: {link['source']} <-> {link['target']}")
     
     def find_closest_link(self, x, y, threshold=25):
@@ -1226,13 +1422,12 @@ class NetworkTopologyGUI:
             x, y: 点击坐标
             threshold: 距离阈值（像素），默认25像素降低灵敏度
         """
-        min_dist = float('inf')
+        min_dist_sq = threshold * threshold
         closest_link = None
 
-        # 获取节点坐标映射
-        node_coords = {node['id']: (node['x'], node['y']) for node in self.nodes}
+        node_coords = self.node_coords
 
-        for link in self.links:
+        for link in self._links_near(x, y, threshold):
             source = link.get('source')
             target = link.get('target')
 
@@ -1240,73 +1435,82 @@ class NetworkTopologyGUI:
                 x1, y1 = node_coords[source]
                 x2, y2 = node_coords[target]
 
-                # 计算点到线段的距离
-                line_length = ((x2 - x1) ** 2 + (y2 - y1) ** 2) ** 0.5
-                if line_length == 0:
+                # 计算点到线段的距离（比较距离的平方，不开方）
+                projection = _segment_projection(x, y, x1, y1, x2, y2)
+                if projection is None:
                     continue
+                dist_sq = projection[1]
 
-                # 计算投影点
-                t = max(0, min(1, ((x - x1) * (x2 - x1) + (y - y1) * (y2 - y1)) / (line_length ** 2)))
-                proj_x = x1 + t * (x2 - x1)
-                proj_y = y1 + t * (y2 - y1)
-
-                dist = ((x - proj_x) ** 2 + (y - proj_y) ** 2) ** 0.5
-
-                if dist < threshold and dist < min_dist:
-                    min_dist = dist
+                if dist_sq < min_dist_sq:
+                    min_dist_sq = dist_sq
                     closest_link = link
 
         return closest_link
     
     def find_closest_node(self, x, y):
         """查找最近的节点"""
-        min_dist = float('inf')
-        closest = None
-        
-        for node in self.nodes:
-            dist = ((node['x'] - x) ** 2 + (node['y'] - y) ** 2) ** 0.5
-            if dist < min_dist and dist < 20:
-                min_dist = dist
-                closest = node
-        
-        return closest
+        return self._nearest_node(x, y, 20)
+    
+    def _on_drag_event(self, event):
+        """鼠标移动事件只记录最新位置，空闲时合并处理一次"""
+        self._pending_drag = (event.x, event.y)
+        if not self._drag_scheduled:
+            self._drag_scheduled = True
+            self.canvas.after_idle(self._flush_drag)
+    
+    def _flush_drag(self):
+        """处理积压的拖拽位置，中间的移动事件被丢弃"""
+        self._drag_scheduled = False
+        pending, self._pending_drag = self._pending_drag, None
+        if pending:
+            self._drag_to(*pending)
     
     def on_canvas_drag(self, event):
         """画布拖拽事件 - 支持节点移动"""
+        self._drag_to(event.x, event.y)
+    
+    def _drag_to(self, event_x, event_y):
+        """将拖拽中的节点移动到鼠标位置"""
         # 实验运行时禁止节点拖动
         if self.experiment_running:
             return
             
         if hasattr(self, 'drag_data') and self.drag_data:
-            dx = event.x - self.drag_data['x']
-            dy = event.y - self.drag_data['y']
+            dx = event_x - self.drag_data['x']
+            dy = event_y - self.drag_data['y']
             
             # 移动节点图形
             self.canvas.move(self.drag_data['item'], dx, dy)
             
             # 移动节点文本
             node = self.drag_data['node']
-            for text_item in self.canvas.find_withtag('text'):
-                coords = self.canvas.coords(text_item)
-                if coords:
-                    text_x = (coords[0] + coords[2]) / 2 if len(coords) == 4 else coords[0]
-                    text_y = (coords[1] + coords[3]) / 2 if len(coords) == 4 else coords[1]
-                    if abs(text_x - node['x']) < 1 and abs(text_y - node['y']) < 1:
-                        self.canvas.move(text_item, dx, dy)
-                        break
+            text_item = self.node_text_items.get(node['id'])
+            if text_item:
+                self.canvas.move(text_item, dx, dy)
             
             # 更新节点数据中的位置
+            old_cell = _grid_cell(node['x'], node['y'])
             node['x'] += dx
             node['y'] += dy
+            self.node_coords[node['id']] = (node['x'], node['y'])
+            new_cell = _grid_cell(node['x'], node['y'])
+            if new_cell != old_cell:
+                self._grid[old_cell].remove(node['id'])
+                self._grid[new_cell].append(node['id'])
+            self._layout_version += 1
+            self._drawn_nodes[node['id']] = (node['type'], node['x'], node['y'])
             
-            # 更新连接线
-            self.redraw_topology()
+            # 更新连接线：原地修改端点坐标，不重建画布项
+            for line, other in self.adj_items.get(node['id'], ()):
+                self.canvas.coords(line, node['x'], node['y'], *self.node_coords[other])
             
-            self.drag_data['x'] = event.x
-            self.drag_data['y'] = event.y
+            self.drag_data['x'] = event_x
+            self.drag_data['y'] = event_y
 
     def on_canvas_release(self, event):
         """画布释放事件"""
+        # 先应用尚未处理的最后一次移动
+        self._flush_drag()
         if hasattr(self, 'drag_data'):
             self.drag_data = None
     
@@ -1329,78 +1533,72 @@ class NetworkTopologyGUI:
             self.log_message("右键取消：已退出工具选择模式")
     
     def redraw_topology(self):
-        """重绘画布 - 确保正确的层级关系：链路(底层) -> 节点形状(中层) -> 编号(顶层)"""
-        self.canvas.delete("all")
+        """重绘画布 - 只增删发生变化的节点和链路画布项
+        
+        层级关系：链路(底层) -> 节点形状(中层) -> 编号(顶层)
+        """
+        nodes_by_id = self.nodes_by_id
         
-        # 创建节点ID到坐标的映射
-        node_coords = {}
+        # 第1步：删除已不存在或类型、位置已变化的节点
+        for node_id, drawn in list(self._drawn_nodes.items()):
+            node = nodes_by_id.get(node_id)
+            if node is None or drawn != (node['type'], node['x'], node['y']):
+                self._erase_node(node_id)
         
-        # 第1步：绘制链路（最底层）
+        # 第2步：绘制新增或变化的节点
+        redrawn = set()
+        for node in self.nodes:
+            if node['id'] not in self._drawn_nodes:
+                self._draw_node(node)
+                redrawn.add(node['id'])
+        
+        # 第3步：同步链路
+        wanted = set()
         for link in self.links:
             source = link.get('source')
             target = link.get('target')
-            
-            if source in [n['id'] for n in self.nodes] and target in [n['id'] for n in self.nodes]:
-                source_node = next(n for n in self.nodes if n['id'] == source)
-                target_node = next(n for n in self.nodes if n['id'] == target)
-                x1, y1 = source_node['x'], source_node['y']
-                x2, y2 = target_node['x'], target_node['y']
-                
-                self.canvas.create_line(x1, y1, x2, y2, fill="black", width=2, tags=('link',))
-        
-        # 第2步：绘制节点形状（中层）
-        for node in self.nodes:
-            x, y = node['x'], node['y']
-            node_id = node['id']
-            
-            if node['type'] == 'host':
-                self.canvas.create_oval(x-15, y-15, x+15, y+15, 
-                                      fill="lightblue", outline="black", width=1, 
-                                      tags=('host', node_id))
-            elif node['type'] == 'switch':
-                self.canvas.create_rectangle(x-15, y-15, x+15, y+15, 
-                                           fill="lightgreen", outline="black", width=1, 
-                                           tags=('switch', node_id))
-        
-        # 第3步：绘制节点编号（顶层）
-        for node in self.nodes:
-            x, y = node['x'], node['y']
-            node_id = node['id']
-            
-            # 使用白色背景使文字更清晰
-            self.canvas.create_text(x, y, text=node_id, 
-                                  font=('Arial', 10, 'bold'),
-                                  fill="black",
-                                  tags=('text', node_id))
+            if source in nodes_by_id and target in nodes_by_id:
+                wanted.add((source, target))
+        
+        for key in [key for key in self.link_lines if key not in wanted]:
+            self._erase_link(*key)
+        
+        for key in wanted:
+            source, target = key
+            line = self.link_lines.get(key)
+            if line is None:
+                self._draw_link(source, target)
+            elif source in redrawn or target in redrawn:
+                self.canvas.coords(line, *self.node_coords[source], *self.node_coords[target])
     
     def update_ui_state(self):
         """更新UI状态 - 根据实验状态控制按钮可用性"""
         running = self.experiment_running
         
         if running:
-            self.exp_status_label.config(text="实验运行中")
+            self._set(self.exp_status_label, text="实验运行中")
             # 实验运行时禁用某些按钮
-            self.start_btn.config(state='disabled')
-            self.stop_btn.config(state='normal')
-            self.create_path_btn.config(state='normal')
-            self.delete_path_btn.config(state='normal')
-            self.algo_combo.config(state='readonly')
+            self._set(self.start_btn, state='disabled')
+            self._set(self.stop_btn, state='normal')
+            self._set(self.create_path_btn, state='normal')
+            self._set(self.delete_path_btn, state='normal')
+            self._set(self.algo_combo, state='readonly')
             
             # 禁用拓扑设计按钮
             for btn in self.tool_buttons.values():
-                btn.config(state='disabled')
+                self._set(btn, state='disabled')
         else:
-            self.exp_status_label.config(text="实验未启动")
+            self._set(self.exp_status_label, text="实验未启动")
             # 实验未启动时启用所有按钮
-            self.start_btn.config(state='normal')
-            self.stop_btn.config(state='disabled')
-            self.create_path_btn.config(state='disabled')
-            self.delete_path_btn.config(state='disabled')
-            self.algo_combo.config(state='disabled')
+            self._set(self.start_btn, state='normal')
+            self._set(self.stop_btn, state='disabled')
+            self._set(self.create_path_btn, state='disabled')
+            self._set(self.delete_path_btn, state='disabled')
+            self._set(self.algo_combo, state='disabled')
             
             # 启用拓扑设计按钮
             for btn in self.tool_buttons.values():
-                btn.config(state='normal')
+                self._set(btn, state='normal')
             
             # 实验停止时重置路径模式
             self.cancel_path_creation()
@@ -1422,8 +1620,9 @@ class NetworkTopologyGUI:
             ]
         }
         
-        self.nodes = topology_data['nodes']
+        self._set_nodes(topology_data['nodes'])
         self.links = topology_data['links']
+        self._rebuild_adjacency()
         self.redraw_topology()
     
     def start_monitoring(self):
@@ -1439,9 +1638,27 @@ class NetworkTopologyGUI:
         messagebox.showinfo("统计信息", "网络监控统计信息将在这里显示")
     
     def log_message(self, message):
-        """记录日志消息到信息窗口"""
+        """记录日志消息到信息窗口（空闲时批量写入）"""
+        self._log_queue.append(message)
+        if not self._log_scheduled:
+            self._log_scheduled = True
+            self.root.after_idle(self._flush_log)
+    
+    def _flush_log(self):
+        """将积压的日志消息一次写入信息窗口"""
+        self._log_scheduled = False
+        if not self._log_queue:
+            return
+        
+        text = '\n'.join(self._log_queue) + '\n'
+        self._log_queue.clear()
+        
         self.info_text.config(state=tk.NORMAL)
-        self.info_text.insert(tk.END, f"{message}\n")
+        self.info_text.insert(tk.END, text)
+        # 只保留最近LOG_MAX_LINES行，避免长时间运行后文本控件无限增长
+        lines = int(self.info_text.index('end-1c').split('.')[0])
+        if lines > LOG_MAX_LINES:
+            self.info_text.delete('1.0', f'{lines - LOG_MAX_LINES + 1}.0')
         self.info_text.see(tk.END)
         self.info_text.config(state=tk.DISABLED)
     
@@ -1474,9 +1691,10 @@ class NetworkTopologyGUI:
     
     def clear_topology(self):
         """清除拓扑显示"""
-        self.canvas.delete("all")
-        self.nodes.clear()
+        self._clear_canvas()
+        self._set_nodes([])
         self.links.clear()
+        self._rebuild_adjacency()
         if hasattr(self, 'selected_nodes'):
             self.selected_nodes.clear()
         if hasattr(self, 'highlighted_path'):
@@ -7,35 +7,14 @@ import sys
 import os
 import logging
 import argparse
+import importlib.util
+import shutil
 
 # 将当前目录添加到Python路径
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-try:
-    from backend_api import BackendAPI
-    BACKEND_AVAILABLE = True
-    logging.info("Backend modules loaded successfully")
-except ImportError as e:
-    BACKEND_AVAILABLE = False
-    logging.warning(f"Backend modules not available: {e}")
-
-try:
-    import gui
-    GUI_AVAILABLE = True
-    logging.info("GUI modules loaded successfully")
-except ImportError as e:
-    GUI_AVAILABLE = False
-    logging.warning(f"GUI modules not available: {e}")
-
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('mininet_controller.log'),
-        logging.StreamHandler()
-    ]
-)
+# 后端和GUI模块（及其依赖的tkinter、networkx）在main()中按运行模式延迟导入，
+# --check/--help无需加载
 
 logger = logging.getLogger(__name__)
 
@@ -43,19 +22,18 @@ def check_dependencies():
     """检查系统依赖"""
     logger.info("检查系统依赖...")
     
+    # 命令行工具在PATH中查找，不再为每项检查启动一个shell
     dependencies = {
-        'mininet': 'which mn',
-        'ovs-vsctl': 'which ovs-vsctl',
-        'ovs-ofctl': 'which ovs-ofctl',
-        'tmux': 'which tmux',
-        'python3-tk': 'python3 -c "import tkinter"'
+        'mininet': shutil.which('mn'),
+        'ovs-vsctl': shutil.which('ovs-vsctl'),
+        'ovs-ofctl': shutil.which('ovs-ofctl'),
+        'tmux': shutil.which('tmux'),
+        'python3-tk': importlib.util.find_spec('_tkinter')
     }
     
     missing = []
-    for name, cmd in dependencies.items():
-        import subprocess
-        result = subprocess.run(cmd, shell=True, capture_output=True)
-        if result.returncode != 0:
+    for name, found in dependencies.items():
+        if found is None:
             missing.append(name)
             logger.warning(f"缺少依赖: {name}")
         else:
@@ -76,8 +54,15 @@ def main():
     
     args = parser.parse_args()
     
-    if args.debug:
-        logging.getLogger().setLevel(logging.DEBUG)
+    # 配置日志
+    logging.basicConfig(
+        level=logging.DEBUG if args.debug else logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('mininet_controller.log'),
+            logging.StreamHandler()
+        ]
+    )
     
     if args.check:
         if check_dependencies():
@@ -88,13 +73,16 @@ def main():
         return
     
     if args.cli:
-        if not BACKEND_AVAILABLE:
+        try:
+            from backend_api import BackendAPI
+            logger.info("Backend modules loaded successfully")
+        except ImportError as e:
+            logger.warning(f"Backend modules not available: {e}")
             print("后端模块不可用，无法启动CLI模式")
             sys.exit(1)
         
         print("启动CLI模式...")
         try:
-            from backend_api import BackendAPI
             backend_api = BackendAPI()
             result = backend_api.start_experiment()
             if result['success']:
@@ -107,13 +95,16 @@ def main():
             print(f"启动CLI失败: {e}")
             sys.exit(1)
     else:
-        if not GUI_AVAILABLE:
+        try:
+            import gui
+            logger.info("GUI modules loaded successfully")
+        except ImportError as e:
+            logger.warning(f"GUI modules not available: {e}")
             print("GUI模块不可用")
             sys.exit(1)
         
         print("启动GUI模式...")
         try:
-            import gui
             gui.main()
         except Exception as e:
             print(f"启动GUI失败: {e}")
@@ -5,17 +5,13 @@ Mininet GUI项目 - 快速环境验证
 
 import sys
 import os
+import shutil
 import subprocess
-import importlib
+import importlib.util
 
 def check_command(cmd):
-    """检查命令是否存在"""
-    try:
-        # 使用which命令检查，避免xterm等命令挂起
-        result = subprocess.run(['which', cmd], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=5)
-        return result.returncode == 0
-    except (subprocess.TimeoutExpired, FileNotFoundError):
-        return False
+    """检查命令是否存在且可执行（不启动which进程，也避免执行xterm等命令挂起）"""
+    return shutil.which(cmd) is not None
 
 def check_mininet():
     """专门检查Mininet"""
@@ -29,9 +25,9 @@ def check_mininet():
 
 def check_package(pkg):
     """检查Python包是否存在"""
+    # 只查找模块而不导入，避免为检查存在性加载matplotlib等大型包
     try:
-        importlib.import_module(pkg)
-        return True
+        return importlib.util.find_spec(pkg) is not None
     except ImportError:
         return False
 
@@ -49,8 +45,8 @@ def main():
     
     print("\n📦 系统命令:")
     
-    # 单独检查Mininet
-    if check_mininet():
+    # 单独检查Mininet：mn不在PATH中时无需再运行mn --version
+    if check_command('mn') and check_mininet():
         print("  ✅ mininet")
     else:
         print("  ❌ mininet")
@@ -6,17 +6,45 @@ Mininet GUI项目 - 环境完整性验证脚本
 
 import sys
 import os
+import argparse
+import time
 import subprocess
 import platform
-import importlib
+import importlib.metadata
+import importlib.util
 import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # 设置日志
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 logger = logging.getLogger(__name__)
 
+# 验证报告文件，同时作为结果缓存
+REPORT_FILE = Path(__file__).parent.parent / 'environment_report.json'
+# 缓存报告的有效期（秒），期间再次运行直接输出缓存结果
+REPORT_TTL = 300
+
+# 模块名与发行包名不同的Python包
+DIST_NAMES = {'dbus': 'dbus-python'}
+
+# 各检查阶段中互不依赖的子进程探测 {名称: (命令, 超时秒数)}，可在检查开始前并行启动
+PROBES = {
+    'openvswitch': (['systemctl', 'is-active', 'openvswitch-switch'], None),
+    'interfaces': (['ip', 'link', 'show'], None),
+    'sudo': (['sudo', '-n', 'true'], None),
+    'groups': (['groups'], None),
+    'mininet_help': (['mn', '--help'], 10)
+}
+
+def _run_probe(cmd, timeout):
+    """运行一条检查命令，命令不存在或超时时返回None"""
+    try:
+        return subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+    except (subprocess.TimeoutExpired, FileNotFoundError):
+        return None
+
 class EnvironmentVerifier:
     def __init__(self):
         self.results = {
@@ -26,6 +54,20 @@ class EnvironmentVerifier:
             'project': {},
             'permissions': {}
         }
+        self._probes = {}  # 已启动的探测 {名称: Future}
+    
+    def start_probes(self, executor):
+        """在executor中并行启动PROBES中的全部探测，各检查阶段稍后直接取结果"""
+        self._probes = {name: executor.submit(subprocess.run, cmd, capture_output=True, text=True, timeout=timeout)
+                        for name, (cmd, timeout) in PROBES.items()}
+    
+    def _probe(self, name):
+        """取探测结果，执行中的异常原样抛出；未提前启动时当场运行"""
+        future = self._probes.get(name)
+        if future is None:
+            cmd, timeout = PROBES[name]
+            return subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+        return future.result()
     
     def check_system_commands(self):
         """检查系统命令可用性"""
@@ -43,10 +85,15 @@ class EnvironmentVerifier:
             'sudo': ['which', 'sudo']
         }
         
-        for cmd, test_cmd in commands.items():
-            try:
-                result = subprocess.run(test_cmd, capture_output=True, text=True, timeout=5)
-                if result.returncode == 0:
+        # 各命令的检查互不依赖，并行启动，总耗时取决于最慢的一条而非逐条累加
+        with ThreadPoolExecutor(max_workers=len(commands) + 1) as executor:
+            futures = {cmd: executor.submit(_run_probe, test_cmd, 5) for cmd, test_cmd in commands.items()}
+            mininet_future = executor.submit(_run_probe, ['mn', '--version'], 10)
+            
+            # 按原顺序记录结果，输出与串行检查一致
+            for cmd, test_cmd in commands.items():
+                result = futures[cmd].result()
+                if result is not None and result.returncode == 0:
                     if 'which' in test_cmd[0]:
                         # 使用which命令检查存在性
                         self.results['system'][cmd] = {'status': 'ok', 'version': '已安装'}
@@ -59,23 +106,20 @@ class EnvironmentVerifier:
                 else:
                     self.results['system'][cmd] = {'status': 'missing', 'message': '命令未找到'}
                     logger.error(f"❌ {cmd}: 命令未找到")
-            except (subprocess.TimeoutExpired, FileNotFoundError):
-                self.results['system'][cmd] = {'status': 'missing', 'message': '命令未找到'}
-                logger.error(f"❌ {cmd}: 命令未找到")
+            
+            # 单独检查Mininet
+            result = mininet_future.result()
         
-        # 单独检查Mininet
-        try:
-            result = subprocess.run(['mn', '--version'], capture_output=True, text=True, timeout=10)
-            if result.returncode == 0:
-                version = result.stdout.strip()
-                self.results['system']['mininet'] = {'status': 'ok', 'version': version}
-                logger.info(f"✅ mininet: {version}")
-            else:
-                self.results['system']['mininet'] = {'status': 'missing', 'message': 'Mininet不可用'}
-                logger.error(f"❌ mininet: Mininet不可用")
-        except (subprocess.TimeoutExpired, FileNotFoundError):
+        if result is None:
             self.results['system']['mininet'] = {'status': 'missing', 'message': 'Mininet未安装'}
             logger.error(f"❌ mininet: Mininet未安装")
+        elif result.returncode == 0:
+            version = result.stdout.strip()
+            self.results['system']['mininet'] = {'status': 'ok', 'version': version}
+            logger.info(f"✅ mininet: {version}")
+        else:
+            self.results['system']['mininet'] = {'status': 'missing', 'message': 'Mininet不可用'}
+            logger.error(f"❌ mininet: Mininet不可用")
     
     def check_python_packages(self):
         """检查Python包"""
@@ -108,26 +152,36 @@ class EnvironmentVerifier:
                         'version': f"Python {sys.version}"
                     }
                     logger.info(f"✅ tkinter: GUI支持正常")
+                elif package_name in sys.modules:
+                    # 已加载的模块（本脚本导入的标准库）无需再次导入
+                    self.results['python'][package_name] = {'status': 'ok', 'version': "内置模块"}
+                    logger.info(f"✅ {package_name}: 内置模块")
                 else:
-                    module = importlib.import_module(package_name)
-                    if hasattr(module, '__version__'):
-                        version = module.__version__
-                    else:
-                        version = "内置模块"
+                    # 只查找模块而不导入，避免为检查存在性加载matplotlib、networkx等大型包
+                    if importlib.util.find_spec(import_name) is None:
+                        raise ImportError(f"No module named '{import_name}'")
+                    version = self._package_version(import_name)
                     self.results['python'][package_name] = {'status': 'ok', 'version': version}
                     logger.info(f"✅ {package_name}: {version}")
             except ImportError as e:
                 self.results['python'][package_name] = {'status': 'missing', 'message': str(e)}
                 logger.error(f"❌ {package_name}: {e}")
     
+    def _package_version(self, import_name):
+        """从已安装包的元数据读取版本号（不导入模块），无元数据时只报告已安装"""
+        top_level = import_name.split('.')[0]
+        try:
+            return importlib.metadata.version(DIST_NAMES.get(top_level, top_level))
+        except importlib.metadata.PackageNotFoundError:
+            return "已安装"
+    
     def check_network_services(self):
         """检查网络服务状态"""
         logger.info("检查网络服务...")
         
         # 检查OpenVSwitch
         try:
-            result = subprocess.run(['systemctl', 'is-active', 'openvswitch-switch'], 
-                                  capture_output=True, text=True)
+            result = self._probe('openvswitch')
             if result.stdout.strip() == 'active':
                 self.results['network']['openvswitch'] = {'status': 'ok', 'message': '运行中'}
                 logger.info("✅ OpenVSwitch: 运行中")
@@ -140,7 +194,7 @@ class EnvironmentVerifier:
         
         # 检查网络接口
         try:
-            result = subprocess.run(['ip', 'link', 'show'], capture_output=True, text=True)
+            result = self._probe('interfaces')
             interfaces = [line for line in result.stdout.split('\n') if 'ovs' in line.lower() or 'eth' in line.lower()]
             self.results['network']['interfaces'] = {'status': 'ok', 'count': len(interfaces)}
             logger.info(f"✅ 网络接口: 发现{len(interfaces)}个接口")
@@ -160,6 +214,7 @@ class EnvironmentVerifier:
             'requirements.txt',
             'backend/__init__.py',
             'backend/mininet_manager.py',
+            'backend/mininet_runner.py',
             'backend/tmux_manager.py',
             'backend/topology_graph.py',
             'backend/path_to_flow.py',
@@ -167,11 +222,21 @@ class EnvironmentVerifier:
             'backend/monitor.py'
         ]
         
+        # 每个目录只扫描一次，得到 {文件名: 大小}，不再对每个文件分别stat两次
+        dir_entries = {}
         for file_path in required_files:
-            full_path = project_root / file_path
-            if full_path.exists():
-                self.results['project'][file_path] = {'status': 'ok', 'size': full_path.stat().st_size}
-                logger.info(f"✅ {file_path}: {full_path.stat().st_size}字节")
+            parent, name = os.path.split(file_path)
+            if parent not in dir_entries:
+                try:
+                    with os.scandir(project_root / parent) as it:
+                        dir_entries[parent] = {entry.name: entry.stat().st_size for entry in it if entry.is_file()}
+                except OSError:
+                    dir_entries[parent] = {}
+            
+            size = dir_entries[parent].get(name)
+            if size is not None:
+                self.results['project'][file_path] = {'status': 'ok', 'size': size}
+                logger.info(f"✅ {file_path}: {size}字节")
             else:
                 self.results['project'][file_path] = {'status': 'missing', 'message': '文件不存在'}
                 logger.error(f"❌ {file_path}: 文件不存在")
@@ -182,7 +247,7 @@ class EnvironmentVerifier:
         
         # 检查sudo权限
         try:
-            result = subprocess.run(['sudo', '-n', 'true'], capture_output=True)
+            result = self._probe('sudo')
             if result.returncode == 0:
                 self.results['permissions']['sudo'] = {'status': 'ok', 'message': '无需密码'}
                 logger.info("✅ sudo: 无需密码验证")
@@ -195,7 +260,7 @@ class EnvironmentVerifier:
         
         # 检查当前用户组
         try:
-            groups = subprocess.run(['groups'], capture_output=True, text=True).stdout.strip()
+            groups = self._probe('groups').stdout.strip()
             if 'sudo' in groups:
                 self.results['permissions']['groups'] = {'status': 'ok', 'message': '在sudo组'}
                 logger.info("✅ 用户组: 在sudo组")
@@ -212,7 +277,7 @@ class EnvironmentVerifier:
         
         # 检查Mininet是否可用
         try:
-            result = subprocess.run(['mn', '--help'], capture_output=True, text=True, timeout=10)
+            result = self._probe('mininet_help')
             if result.returncode == 0 or 'Usage:' in result.stdout:
                 self.results['network']['mininet_available'] = {'status': 'ok', 'message': 'Mininet可用'}
                 logger.info("✅ Mininet: 可用")
@@ -259,27 +324,56 @@ class EnvironmentVerifier:
             print("⚠️  环境不完整，请修复上述问题")
             return False
     
+    def _fingerprint(self):
+        """系统指纹：系统信息、解释器和PATH任一变化时缓存的报告失效"""
+        return list(platform.uname()) + [sys.executable, os.environ.get('PATH', '')]
+    
+    def load_report(self):
+        """读取REPORT_TTL秒内、系统指纹一致的缓存报告，成功时返回True"""
+        try:
+            if time.time() - REPORT_FILE.stat().st_mtime >= REPORT_TTL:
+                return False
+            with open(REPORT_FILE) as f:
+                data = json.load(f)
+            if data.pop('fingerprint', None) != self._fingerprint():
+                return False
+        except (OSError, ValueError):
+            return False
+        
+        self.results = data
+        logger.info(f"使用缓存的验证报告: {REPORT_FILE}（--force重新检查）")
+        return True
+    
     def save_report(self):
         """保存详细报告到文件"""
-        report_file = Path(__file__).parent.parent / 'environment_report.json'
-        with open(report_file, 'w') as f:
-            json.dump(self.results, f, indent=2, default=str)
-        logger.info(f"详细报告已保存到: {report_file}")
+        with open(REPORT_FILE, 'w') as f:
+            json.dump(dict(self.results, fingerprint=self._fingerprint()), f, indent=2, default=str)
+        logger.info(f"详细报告已保存到: {REPORT_FILE}")
 
 def main():
     """主函数"""
     print("Mininet GUI项目 - 环境完整性验证")
     print("="*50)
     
+    parser = argparse.ArgumentParser(description='Mininet GUI项目 - 环境完整性验证')
+    parser.add_argument('--force', action='store_true', help='忽略缓存的报告，重新执行全部检查')
+    args = parser.parse_args()
+    
     verifier = EnvironmentVerifier()
     
-    # 执行各项检查
-    verifier.check_system_commands()
-    verifier.check_python_packages()
-    verifier.check_network_services()
-    verifier.check_project_structure()
-    verifier.check_permissions()
-    verifier.check_mininet_functionality()
+    # 缓存的报告仍有效时直接输出
+    if not args.force and verifier.load_report():
+        return 0 if verifier.generate_report() else 1
+    
+    # 执行各项检查：各阶段的子进程探测先全部并行启动，检查按原顺序进行并记录结果
+    with ThreadPoolExecutor(max_workers=len(PROBES)) as executor:
+        verifier.start_probes(executor)
+        verifier.check_system_commands()
+        verifier.check_python_packages()
+        verifier.check_network_services()
+        verifier.check_project_structure()
+        verifier.check_permissions()
+        verifier.check_mininet_functionality()
     
     # 生成报告
     success = verifier.generate_report()